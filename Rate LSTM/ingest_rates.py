@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+银行汇率导出文件流式导入
+替代 convert_to_csv.py -> reverse.py 两步转换：分块读取银行导出的制表符分隔 .txt
+（日期 / 现钞卖出价 ...），统一日期格式和升序排列、去重后，
+只把比规范CSV最后一天更新的行追加到 {货币}_to_exchange_rate.csv，不重写已有数据，
+也不再生成中间的 _no_rev 文件
+
+用法:
+    python3 ingest_rates.py                                   # 导入 bank-data/*/ 下所有 .txt
+    python3 ingest_rates.py bank-data/ICBC/MYR_to_exchange_rate.txt exports/*.txt --target bank-data/ICBC/MYR_to_exchange_rate.csv
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import argparse
+
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BANK_ROOT = os.path.join(SCRIPT_DIR, 'bank-data')
+
+DATE_COLUMN = '日期'
+RATE_COLUMN = '现钞卖出价'
+CSV_HEADER = 'Date,Exchange_Rate\n'
+CHUNK_SIZE = 50000
+
+# 同一货币可以有多份导出，如 MYR_to_exchange_rate.txt、MYR_to_exchange_rate_2023.txt
+EXPORT_FILE_PATTERN = re.compile(r'^((?:CNY_)?[A-Z]{3}_to_exchange_rate)(?:[_\-. ].*)?\.txt$')
+
+
+def canonical_path(export_path):
+    """导出文件对应的规范CSV：同目录下的 {货币}_to_exchange_rate.csv"""
+    match = EXPORT_FILE_PATTERN.match(os.path.basename(export_path))
+    if not match:
+        raise ValueError(f'Cannot infer currency from file name: {export_path}')
+    return os.path.join(os.path.dirname(export_path), f'{match.group(1)}.csv')
+
+
+def last_date(csv_path):
+    """读取规范CSV最后一行的日期（只读文件末尾），文件不存在或没有数据时返回 None"""
+    if not os.path.exists(csv_path):
+        return None
+    with open(csv_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - 4096, 0))
+        lines = [line for line in f.read().decode('utf-8').splitlines() if line.strip()]
+    if not lines:
+        return None
+    date = pd.to_datetime(lines[-1].split(',')[0].strip().replace('/', '-'), errors='coerce')
+    return None if pd.isna(date) else date
+
+
+def read_new_rows(export_path, after=None, chunksize=CHUNK_SIZE):
+    """分块读取导出文件，返回 (日期晚于 after 的 {日期: 汇率}, 读取行数)"""
+    rows = {}
+    total = 0
+    for chunk in pd.read_csv(export_path, sep='\t', encoding='utf-8', dtype=str,
+                             usecols=[DATE_COLUMN, RATE_COLUMN], chunksize=chunksize):
+        total += len(chunk)
+        dates = pd.to_datetime(chunk[DATE_COLUMN].str.strip().str.replace('/', '-'), errors='coerce')
+        rates = pd.to_numeric(chunk[RATE_COLUMN].str.strip(), errors='coerce')
+        keep = dates.notna() & rates.notna()
+        if after is not None:
+            keep &= dates > after
+        rows.update(zip(dates[keep].dt.strftime('%Y-%m-%d'), rates[keep]))
+    return rows, total
+
+
+def ingest(export_paths, target_path):
+    """把多个导出文件中的新行合并、排序后追加到规范CSV，返回导入统计"""
+    after = last_date(target_path)
+    new_rows = {}
+    read = 0
+    for export_path in export_paths:
+        rows, total = read_new_rows(export_path, after)
+        # 后处理的导出文件覆盖同一日期的旧报价
+        new_rows.update(rows)
+        read += total
+
+    if new_rows:
+        write_header = not os.path.exists(target_path) or os.path.getsize(target_path) == 0
+        needs_newline = False
+        if not write_header:
+            with open(target_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        with open(target_path, 'a', encoding='utf-8') as f:
+            if write_header:
+                f.write(CSV_HEADER)
+            elif needs_newline:
+                f.write('\n')
+            for date in sorted(new_rows):
+                f.write(f'{date},{float(new_rows[date])!r}\n')
+
+    return {
+        'target': target_path,
+        'sources': export_paths,
+        'read_rows': read,
+        'appended_rows': len(new_rows),
+        'previous_last_date': after.strftime('%Y-%m-%d') if after is not None else None,
+        'last_date': max(new_rows) if new_rows else (after.strftime('%Y-%m-%d') if after is not None else None),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式导入银行汇率导出文件')
+    parser.add_argument('exports', nargs='*', help='银行导出的 .txt 文件（默认 bank-data/*/ 下全部）')
+    parser.add_argument('--target', help='追加到的规范CSV（默认按文件名推断，同目录同货币）')
+    args = parser.parse_args()
+
+    exports = args.exports or sorted(glob.glob(os.path.join(DEFAULT_BANK_ROOT, '*', '*.txt')))
+
+    # 按目标文件分组，同一目标的多个导出文件一起合并去重
+    groups = {}
+    for export_path in exports:
+        target = args.target or canonical_path(export_path)
+        groups.setdefault(os.path.abspath(target), []).append(export_path)
+
+    reports = []
+    for target, export_paths in groups.items():
+        try:
+            report = ingest(export_paths, target)
+            print(f"{target}: +{report['appended_rows']} rows (last date {report['last_date']})", file=sys.stderr)
+        except Exception as e:
+            print(f"导入 {target} 时出错: {e}", file=sys.stderr)
+            report = {'target': target, 'sources': export_paths, 'error': str(e)}
+        reports.append(report)
+
+    print(json.dumps(reports, ensure_ascii=False, indent=2))
+    sys.exit(1 if any('error' in r for r in reports) else 0)
+
+
+if __name__ == '__main__':
+    main()
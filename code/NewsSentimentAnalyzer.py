@@ -1,24 +1,76 @@
 import os
+import sys
+import time
+import threading
+import importlib.util
 os.environ["TRANSFORMERS_NO_TF"] = "1"  # 保证不用 TensorFlow
-from transformers import pipeline
 
-Scorer = pipeline("text-classification", model="ProsusAI/finbert")
-Summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# 批量摘要/打分流水线与情感分析后端共用，位于 frontend/scripts
+SHARED_DIR = os.path.join(BASE_DIR, '..', 'frontend', 'scripts')
+
+def _load_shared(name):
+    """按文件路径加载 frontend/scripts 下的共用模块，不把整个目录加入 sys.path"""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(SHARED_DIR, f'{name}.py'))
+        module = importlib.util.module_from_spec(spec)
+        # 先登记再执行，sentiment_pipeline 中的 from sentiment_cache import ... 直接取到这里加载的模块
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+SentimentCache = _load_shared('sentiment_cache').SentimentCache
+SentimentPipeline = _load_shared('sentiment_pipeline').SentimentPipeline
+
+# 超过 FinBERT 512 token 上限的文本切成重叠窗口打分后加权平均；SENTIMENT_MODE=summarize 时改为先概括
+MODE = os.environ.get('SENTIMENT_MODE', 'chunk')
+
+# 重复出现的新闻只概括、打分一次，结果保存在 sentiment_cache/ 下，重启后仍然有效
+CACHE_PATH = os.path.join(BASE_DIR, 'sentiment_cache', 'sentiment.sqlite3')
+
+# 模型和缓存在第一次评分时才加载/打开，导入本模块（如 app.py、main.py）不再承担加载开销；
+# 只有 summarize 模式才加载 BART
+Cache = None
+Pipeline = None
+_pipeline_lock = threading.Lock()
+
+def get_pipeline():
+    global Cache, Pipeline
+    with _pipeline_lock:
+        if Pipeline is None:
+            from transformers import pipeline
+            started = time.perf_counter()
+            if Cache is None:
+                Cache = SentimentCache(CACHE_PATH)
+            scorer = pipeline("text-classification", model="ProsusAI/finbert")
+            summarizer = pipeline("summarization", model="facebook/bart-large-cnn") if MODE == 'summarize' else None
+            Pipeline = SentimentPipeline(scorer, summarizer, mode=MODE,
+                                         summary_max_length=60, summary_min_length=5, cache=Cache)
+            print (f"情感模型加载完成 ({MODE}): {time.perf_counter() - started:.1f}s")
+    return Pipeline
+
+def _top(all_scores):
+    return max(all_scores, key=lambda result: result['score'])
+
+def score_batch(texts):
+    """
+    批量评分：超长文本切窗口（或概括），按长度分桶批量打分
+    返回每条文本得分最高的 {'label', 'score'} 以及各阶段耗时
+    """
+    all_scores, _, timings = get_pipeline().run(list(texts))
+    print (f"批量评分 {timings['documents']} 条: 缓存命中 {timings['cache_hits']} 条, 超长 {timings['long']} 条, 概括 {timings['summarized']} 条 "
+           f"{timings['summarize']:.2f}s, 打分 {timings['score']:.2f}s")
+    return [_top(scores) for scores in all_scores], timings
 
 def score(text):
     """
     使用 FinBERT 评分文本情感
-    先概括， 再打分
+    超过 512 token 的文本切窗口打分后汇总（或先概括， 再打分）
     """
-    lenth = len(text)
-    if lenth > 60:
-        summary = Summarizer(text, max_length=60, min_length=5, do_sample=False)
-        summary = summary[0]['summary_text']
-        print (f"概括结果: {summary}")
-    else:
-        summary = text
-    ret = Scorer(summary)
-    return ret
+    all_scores, summaries, _ = get_pipeline().run([text])
+    if summaries[0] != text:
+        print (f"概括结果: {summaries[0]}")
+    return [_top(all_scores[0])]
 
 def example():
     article = """
@@ -1,6 +1,87 @@
 import { NextResponse } from "next/server"
 import { parse } from "csv-parse/sync"
 
+const SENTIMENT_SERVICE_URL = "http://localhost:5000"
+// Articles sent to the sentiment service per /score_batch request
+const SENTIMENT_BATCH_SIZE = 256
+// Extra /score_batch attempts for a batch that failed (e.g. 503 while models are still loading)
+const SENTIMENT_BATCH_RETRIES = 2
+const SENTIMENT_RETRY_DELAY_MS = 2000
+const SENTIMENT_MAX_RETRY_DELAY_MS = 10000
+
+type SentimentResult = { score?: number; error?: string }
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
+
+function retryDelay(response: Response | null): number {
+  // Honour the service's Retry-After header (seconds), capped so one import cannot stall for long
+  const retryAfter = Number(response?.headers.get("Retry-After"))
+  if (retryAfter > 0) {
+    return Math.min(retryAfter * 1000, SENTIMENT_MAX_RETRY_DELAY_MS)
+  }
+  return SENTIMENT_RETRY_DELAY_MS
+}
+
+// Score one batch with /score_batch, retrying failed requests; returns null if every attempt failed
+async function scoreBatch(batch: string[]): Promise<SentimentResult[] | null> {
+  for (let attempt = 0; attempt <= SENTIMENT_BATCH_RETRIES; attempt++) {
+    let response: Response | null = null
+    try {
+      response = await fetch(`${SENTIMENT_SERVICE_URL}/score_batch`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({ texts: batch }),
+      })
+      if (response.ok) {
+        const sentimentData = await response.json()
+        return sentimentData.results || []
+      }
+      console.warn(
+        `Batch of ${batch.length} articles failed (attempt ${attempt + 1}): ${response.status} ${response.statusText}`,
+      )
+      // Client errors will not succeed on retry
+      if (response.status >= 400 && response.status < 500) {
+        return null
+      }
+    } catch (sentimentError) {
+      console.error(`Error calling sentiment API for ${batch.length} articles (attempt ${attempt + 1}): ${sentimentError}`)
+    }
+    if (attempt < SENTIMENT_BATCH_RETRIES) {
+      await sleep(retryDelay(response))
+    }
+  }
+  return null
+}
+
+// Fallback for a batch that could not be scored: one /score request per article
+async function scoreArticles(batch: string[]): Promise<SentimentResult[]> {
+  const results: SentimentResult[] = []
+  for (const [index, text] of batch.entries()) {
+    try {
+      const sentimentResponse = await fetch(`${SENTIMENT_SERVICE_URL}/score`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({ text }),
+      })
+      if (sentimentResponse.status === 503) {
+        // Models are still unavailable: the remaining articles would fail the same way
+        const error = `Sentiment service unavailable: ${sentimentResponse.statusText}`
+        return results.concat(batch.slice(index).map(() => ({ error })))
+      }
+      results.push(
+        sentimentResponse.ok ? await sentimentResponse.json() : { error: sentimentResponse.statusText },
+      )
+    } catch (sentimentError) {
+      results.push({ error: String(sentimentError) })
+    }
+  }
+  return results
+}
+
 export async function POST(req: Request) {
   try {
     const formData = await req.formData()
@@ -18,34 +99,38 @@ export async function POST(req: Request) {
       skip_empty_lines: true,
     })
 
-    let totalSentimentScore = 0
-    let processedArticlesCount = 0
-
+    const articleTexts: string[] = []
     for (const record of records) {
       const recordData = record as any // Type assertion for CSV record
       const articleText = recordData.content || recordData.article_text || recordData.text // Try multiple column names
       if (articleText) {
-        try {
-          // Call the Python Flask sentiment analysis service directly
-          const sentimentResponse = await fetch("http://localhost:5000/score", {
-            method: "POST",
-            headers: {
-              "Content-Type": "application/json",
-            },
-            body: JSON.stringify({ text: articleText }),
-          })
+        articleTexts.push(articleText)
+      }
+    }
+
+    let totalSentimentScore = 0
+    let processedArticlesCount = 0
+    let failedArticlesCount = 0
 
-          if (sentimentResponse.ok) {
-            const sentimentData = await sentimentResponse.json()
-            // Use sentimentData.score which is the numerical score (-1 to 1)
-            totalSentimentScore += sentimentData.score || 0
-            processedArticlesCount++
-          } else {
-            console.warn(`Failed to get sentiment for an article: ${sentimentResponse.statusText}`)
-          }
-        } catch (sentimentError) {
-          console.error(`Error calling sentiment API for an article: ${sentimentError}`)
+    // Score articles in batches: one request per SENTIMENT_BATCH_SIZE articles instead of one per article
+    for (let start = 0; start < articleTexts.length; start += SENTIMENT_BATCH_SIZE) {
+      const batch = articleTexts.slice(start, start + SENTIMENT_BATCH_SIZE)
+      // Call the Python Flask sentiment analysis service directly; a batch that keeps failing
+      // is scored article by article so one bad request does not drop all of its articles
+      let results = await scoreBatch(batch)
+      if (results === null) {
+        console.warn(`Falling back to per-article scoring for ${batch.length} articles`)
+        results = await scoreArticles(batch)
+      }
+      for (const result of results) {
+        if (result.error) {
+          console.warn(`Failed to get sentiment for an article: ${result.error}`)
+          failedArticlesCount++
+          continue
         }
+        // Use result.score which is the numerical score (-1 to 1)
+        totalSentimentScore += result.score || 0
+        processedArticlesCount++
       }
     }
 
@@ -53,8 +138,12 @@ export async function POST(req: Request) {
 
     return NextResponse.json({
       success: true,
-      message: `Successfully imported ${processedArticlesCount} news articles.`,
+      message:
+        failedArticlesCount > 0
+          ? `Imported ${processedArticlesCount} news articles; ${failedArticlesCount} could not be scored.`
+          : `Successfully imported ${processedArticlesCount} news articles.`,
       importedCount: processedArticlesCount,
+      failedCount: failedArticlesCount,
       overallSentiment: overallSentiment,
     })
   } catch (error) {
@@ -67,6 +67,28 @@ export async function POST(request: NextRequest) {
     console.log('Python script path:', pythonScriptPath);
     console.log('Dataset path:', datasetPath);
     
+    // 优先使用常驻预测服务（TensorFlow和模型已在内存中）
+    const predictionServerUrl = process.env.PREDICTION_SERVER_URL || 'http://localhost:5003';
+    try {
+      const serverResponse = await fetch(`${predictionServerUrl}/predict`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          currency: toCurrency,
+          days,
+          dataset_path: datasetPath,
+          modelType
+        }),
+        signal: AbortSignal.timeout(120000)
+      });
+      if (serverResponse.ok) {
+        return NextResponse.json(await serverResponse.json());
+      }
+      console.warn(`Prediction server returned ${serverResponse.status}, falling back to script`);
+    } catch (serverError) {
+      console.warn('Prediction server unavailable, falling back to script:', serverError);
+    }
+    
     // 执行Python预测脚本，传递数据集路径
     const result = await new Promise((resolve, reject) => {
       const pythonProcess = spawn('python3', [
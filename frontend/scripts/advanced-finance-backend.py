@@ -1,13 +1,16 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import os
 import json
 import time
 import random
 from datetime import datetime, timedelta
 import numpy as np
-import requests
 import logging
 
+from rate_fetcher import RateFetcher
+from cross_rates import fallback_matrix
+
 app = Flask(__name__)
 CORS(app)
 
@@ -15,8 +18,13 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 
 class AdvancedCurrencyAnalyzer:
-    def __init__(self):
+    def __init__(self, rate_fetcher=None):
+        # 共享连接池的异步汇率获取器，汇率表按TTL缓存
+        self.rate_fetcher = rate_fetcher or RateFetcher(
+            ttl=int(os.environ.get('RATE_CACHE_TTL', 60)),
+            cooldown=int(os.environ.get('RATE_PROVIDER_COOLDOWN', 30)))
         self.supported_currencies = ['USD', 'EUR', 'GBP', 'JPY', 'CNY', 'KRW', 'AUD', 'CAD', 'CHF', 'HKD', 'SGD', 'THB', 'MYR']
+        self.fallback_rates = fallback_matrix(self.supported_currencies)
         
         # 定义兑换渠道
         self.exchange_channels = {
@@ -489,109 +497,34 @@ class AdvancedCurrencyAnalyzer:
         except Exception as e:
             logging.warning(f"实时汇率获取失败: {e}，使用备用汇率")
         
-        # 备用汇率数据（当实时API不可用时使用）
-        fallback_rates = {
-            'USDCNY': 7.2345,
-            'EURCNY': 7.8901,
-            'GBPCNY': 9.1234,
-            'JPYCNY': 0.0489,  # 更新为实际JPY汇率
-            'CNYJPY': 20.45,   # CNY到JPY
-            'CNYSGD': 5.20,    # CNY到SGD
-            'CNYHKD': 0.92,    # CNY到HKD
-            'CNYKRW': 185.67,
-            'CNYTHB': 0.197,   # CNY到THB
-            'CNYMYR': 1.58,    # CNY到MYR
-        }
-        
-        rate_key = f'{from_currency}{to_currency}'
-        reverse_key = f'{to_currency}{from_currency}'
-        
-        if rate_key in fallback_rates:
-            return fallback_rates[rate_key]
-        elif reverse_key in fallback_rates:
-            return 1.0 / fallback_rates[reverse_key]
-        else:
+        return self._get_fallback_rate(from_currency, to_currency)
+    
+    def _get_fallback_rate(self, from_currency, to_currency):
+        """备用汇率数据（当实时API不可用时使用）"""
+        rate = self.fallback_rates.rate(from_currency, to_currency)
+        if rate is None:
             logging.warning(f"未找到汇率对: {from_currency}/{to_currency}，使用默认值1.0")
             return 1.0
+        return rate
     
     def _fetch_real_time_rate(self, from_currency, to_currency):
-        """从实时API获取汇率"""
+        """获取实时汇率：优先读取后台刷新的交叉汇率矩阵，矩阵不可用时才请求汇率源"""
         try:
-            # 方案1: 使用 exchangerate-api.com (免费tier每月1500次请求)
-            api_key = "YOUR_API_KEY"  # 如果有API key可以填入
-            
-            # 免费的API (无需API key)
-            free_apis = [
-                {
-                    'name': 'exchangerate-api',
-                    'url': f'https://api.exchangerate-api.com/v4/latest/{from_currency}',
-                    'parser': lambda data: data.get('rates', {}).get(to_currency)
-                },
-                {
-                    'name': 'fixer.io',
-                    'url': f'https://api.fixer.io/latest?base={from_currency}&symbols={to_currency}',
-                    'parser': lambda data: data.get('rates', {}).get(to_currency)
-                },
-                {
-                    'name': 'currencylayer', 
-                    'url': f'https://apilayer.net/api/live?access_key=free&currencies={to_currency}&source={from_currency}&format=1',
-                    'parser': lambda data: data.get('quotes', {}).get(f'{from_currency}{to_currency}')
-                }
-            ]
-            
-            # 尝试每个API
-            for api in free_apis:
-                try:
-                    response = requests.get(api['url'], timeout=5)
-                    if response.status_code == 200:
-                        data = response.json()
-                        rate = api['parser'](data)
-                        if rate and isinstance(rate, (int, float)) and rate > 0:
-                            logging.info(f"从 {api['name']} 获取汇率成功: {rate}")
-                            return float(rate)
-                except Exception as api_error:
-                    logging.warning(f"{api['name']} API 失败: {api_error}")
-                    continue
-            
-            # 如果所有免费API都失败，尝试一个简单的汇率计算
-            return self._calculate_cross_rate(from_currency, to_currency)
+            cached = self.rate_fetcher.cached_rate(from_currency, to_currency)
+            if cached is not None:
+                if cached['stale']:
+                    logging.warning(f"交叉汇率矩阵已过期: {from_currency}/{to_currency}")
+                return cached['rate']
             
+            result = self.rate_fetcher.fetch(from_currency, to_currency)
+            if result is None:
+                return None
+            source, rate = result
+            logging.info(f"从 {source} 获取汇率成功: {rate}")
+            return rate
         except Exception as e:
             logging.error(f"实时汇率获取完全失败: {e}")
             return None
-    
-    def _calculate_cross_rate(self, from_currency, to_currency):
-        """计算交叉汇率（通过USD中转）"""
-        try:
-            if from_currency == 'USD':
-                # 直接获取USD到目标货币的汇率
-                response = requests.get(f'https://api.exchangerate-api.com/v4/latest/USD', timeout=3)
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get('rates', {}).get(to_currency)
-            elif to_currency == 'USD':
-                # 获取源货币到USD的汇率
-                response = requests.get(f'https://api.exchangerate-api.com/v4/latest/{from_currency}', timeout=3)
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get('rates', {}).get('USD')
-            else:
-                # 通过USD计算交叉汇率
-                usd_response = requests.get('https://api.exchangerate-api.com/v4/latest/USD', timeout=3)
-                if usd_response.status_code == 200:
-                    usd_data = usd_response.json()
-                    usd_rates = usd_data.get('rates', {})
-                    
-                    from_to_usd = 1.0 / usd_rates.get(from_currency, 1.0)  # 源货币到USD
-                    usd_to_target = usd_rates.get(to_currency, 1.0)  # USD到目标货币
-                    
-                    cross_rate = from_to_usd * usd_to_target
-                    if cross_rate > 0:
-                        return cross_rate
-        except Exception as e:
-            logging.error(f"交叉汇率计算失败: {e}")
-        
-        return None
 
 # 创建分析器实例
 analyzer = AdvancedCurrencyAnalyzer()
@@ -604,7 +537,8 @@ def health_check():
         'service': 'advanced_currency_analyzer',
         'version': '2.0.0',
         'timestamp': datetime.now().isoformat(),
-        'features': ['multi_channel', 'user_preferences', 'risk_assessment']
+        'features': ['multi_channel', 'user_preferences', 'risk_assessment'],
+        'rate_cache': analyzer.rate_fetcher.stats()
     })
 
 @app.route('/analyze_advanced_strategy', methods=['POST'])
@@ -678,16 +612,11 @@ def get_real_time_rate():
         if to_currency not in analyzer.supported_currencies:
             return jsonify({'error': f'不支持的目标货币: {to_currency}'}), 400
         
-        # 获取实时汇率
-        rate = analyzer._get_base_rate(from_currency, to_currency)
-        
-        # 尝试获取实时汇率详情
-        try:
-            real_time_rate = analyzer._fetch_real_time_rate(from_currency, to_currency)
-            is_real_time = real_time_rate is not None
-        except:
-            real_time_rate = None
-            is_real_time = False
+        # 获取实时汇率（只请求一次，失败时使用备用汇率）
+        cached = analyzer.rate_fetcher.cached_rate(from_currency, to_currency)
+        real_time_rate = analyzer._fetch_real_time_rate(from_currency, to_currency)
+        is_real_time = real_time_rate is not None
+        rate = real_time_rate if is_real_time else analyzer._get_fallback_rate(from_currency, to_currency)
         
         return jsonify({
             'success': True,
@@ -698,7 +627,9 @@ def get_real_time_rate():
             'is_real_time': is_real_time,
             'timestamp': datetime.now().isoformat(),
             'rate_pair': f'{from_currency}/{to_currency}',
-            'inverse_rate': round(1.0 / rate, 6) if rate > 0 else 0
+            'inverse_rate': round(1.0 / rate, 6) if rate > 0 else 0,
+            'rate_updated_at': datetime.fromtimestamp(cached['updated_at']).isoformat() if cached else None,
+            'is_stale': cached['stale'] if cached else None
         })
         
     except Exception as e:
@@ -713,6 +644,12 @@ if __name__ == '__main__':
     print("实时汇率查询: POST http://localhost:5002/get_real_time_rate")
     print("按 Ctrl+C 停止服务")
     
+    # 后台定时刷新所有支持货币的交叉汇率，请求处理不再等待上游API
+    analyzer.rate_fetcher.start_scheduler(
+        analyzer.supported_currencies,
+        interval=int(os.environ.get('RATE_REFRESH_INTERVAL', 60))
+    )
+    
     app.run(
         host='0.0.0.0',
         port=5002,
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+FinBERT 推理运行时对比
+在新闻CSV（news-advanced.csv 等格式，正文列为 content / article_text / text）上
+分别用 pytorch、onnx、onnx-int8 打分（与服务相同的分桶批量流水线，不使用缓存），对比：
+- 准确性：与 pytorch 结果的主标签一致率、综合分数（positive - negative）的平均/最大误差，
+  CSV 带 impact 列（正面/负面/中性）时另外给出与人工标注的一致率
+- 速度：每秒文章数，以及每核秒文章数（文章数 / 进程 CPU 时间）
+
+用法: python3 benchmark_sentiment.py [CSV] [--runtimes pytorch onnx onnx-int8] [--articles 512] [--repeat 3]
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+
+import numpy as np
+
+from finbert_onnx import RUNTIMES, DEFAULT_ONNX_DIR, load_scorer
+from sentiment_pipeline import SentimentPipeline
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(SCRIPT_DIR, '..', '..', 'news-advanced.csv')
+TEXT_COLUMNS = ('content', 'article_text', 'text')
+IMPACT_LABELS = {'正面': 'positive', '负面': 'negative', '中性': 'neutral'}
+
+
+def read_articles(path):
+    """返回 (正文列表, 人工标注列表或 None)"""
+    texts, labels = [], []
+    with open(path, encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            text = next((row[c] for c in TEXT_COLUMNS if row.get(c)), None)
+            if text:
+                texts.append(text)
+                labels.append(IMPACT_LABELS.get((row.get('impact') or '').strip()))
+    return texts, (labels if any(labels) else None)
+
+
+def summarize_scores(all_scores):
+    """(主标签, 综合分数) 数组"""
+    top, overall = [], []
+    for scores in all_scores:
+        by_label = {r['label'].lower(): r['score'] for r in scores}
+        top.append(max(by_label, key=by_label.get))
+        overall.append(by_label.get('positive', 0.0) - by_label.get('negative', 0.0))
+    return np.array(top), np.array(overall)
+
+
+def run_runtime(runtime, texts, args):
+    """返回 (最后一次打分结果, 最快一次的墙钟秒数, 对应的 CPU 秒数)"""
+    started = time.perf_counter()
+    scorer = load_scorer(runtime, args.onnx_dir)
+    print(f"{runtime}: 模型加载 {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    pipeline = SentimentPipeline(scorer, batch_size=args.batch_size)
+
+    # 预热一次，排除首次调用的初始化开销
+    pipeline.run(texts[:args.batch_size])
+    best_wall, best_cpu, results = None, None, None
+    for _ in range(args.repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        results, _, _ = pipeline.run(texts)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if best_wall is None or wall < best_wall:
+            best_wall, best_cpu = wall, cpu
+    return results, best_wall, best_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FinBERT 推理运行时准确性/速度对比')
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV)
+    parser.add_argument('--runtimes', nargs='*', default=list(RUNTIMES), choices=RUNTIMES)
+    parser.add_argument('--articles', type=int, default=512, help='CSV 行数不足时循环补足到该数量')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--onnx-dir', default=DEFAULT_ONNX_DIR)
+    args = parser.parse_args()
+
+    texts, labels = read_articles(args.csv)
+    if not texts:
+        sys.exit(f"No articles found in {args.csv}")
+    count = max(args.articles, len(texts))
+    texts = [texts[i % len(texts)] for i in range(count)]
+    labels = [labels[i % len(labels)] for i in range(count)] if labels else None
+    print(f"文章数: {count}（CSV {args.csv}），批大小: {args.batch_size}，CPU 核数: {os.cpu_count()}")
+
+    baseline = None
+    for runtime in args.runtimes:
+        try:
+            results, wall, cpu = run_runtime(runtime, texts, args)
+        except Exception as e:
+            print(f"{runtime:<10} 失败: {e}")
+            continue
+        top, overall = summarize_scores(results)
+        if baseline is None:
+            baseline = (runtime, top, overall)
+
+        line = (f"{runtime:<10} {count / wall:8.1f} 篇/秒 | {count / max(cpu, 1e-9):8.1f} 篇/核秒"
+                f" | 墙钟 {wall:6.2f}s CPU {cpu:6.2f}s")
+        if baseline[0] != runtime:
+            diff = np.abs(overall - baseline[2])
+            line += (f" | 与 {baseline[0]} 标签一致 {np.mean(top == baseline[1]):6.1%}"
+                     f" 分数误差 均值 {diff.mean():.4f} 最大 {diff.max():.4f}")
+        if labels:
+            labelled = np.array([label is not None for label in labels])
+            line += f" | 人工标注一致 {np.mean(top[labelled] == np.array(labels)[labelled]):6.1%}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
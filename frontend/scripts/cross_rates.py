@@ -0,0 +1,96 @@
+"""
+交叉汇率矩阵
+由一条基准向量（每种货币折合参考货币的数量）构造 N×N 矩阵，
+values[i, j] 为 1 单位 currencies[i] 兑换的 currencies[j] 数量，
+按货币代码查索引即可 O(1) 取任意货币对，多货币对的批量换算直接用数组运算
+
+三个策略后端共用这里的备用汇率，不再各自维护字符串键的汇率表；
+个别后端原有报价与共用表不一致的货币对，由该后端以 quotes 覆盖，保持原值
+"""
+
+import numpy as np
+
+# 备用汇率：1 单位外币折合人民币（实时汇率不可用时使用）
+FALLBACK_CNY_RATES = {
+    'USD': 7.2345,
+    'EUR': 7.8901,
+    'GBP': 9.1234,
+    'JPY': 0.0489,
+    'CNY': 1.0000,
+    'KRW': 0.0054,
+    'AUD': 4.8567,
+    'CAD': 5.3421,
+    'CHF': 8.1234,
+    'HKD': 0.9234,
+    'SGD': 5.4321,
+    'THB': 0.2012,
+    'MYR': 1.5432,
+    'VND': 0.0003,
+    'PHP': 0.1287,
+}
+
+
+class CrossRateMatrix:
+    def __init__(self, currencies, base_values):
+        """base_values[i]：1 单位 currencies[i] 折合参考货币的数量，缺失用 NaN"""
+        self.currencies = list(currencies)
+        self.index = {currency: i for i, currency in enumerate(self.currencies)}
+        self.base_values = np.asarray(base_values, dtype='float64')
+        self.values = self.base_values[:, np.newaxis] / self.base_values[np.newaxis, :]
+
+    @classmethod
+    def from_reference_rates(cls, reference_rates, currencies=None):
+        """由 {货币: 折合参考货币数量} 构造，如 FALLBACK_CNY_RATES"""
+        currencies = list(currencies or reference_rates)
+        return cls(currencies, [reference_rates.get(c, np.nan) for c in currencies])
+
+    @classmethod
+    def from_quote_table(cls, currencies, quotes):
+        """由汇率API的报价表 {货币: 1 单位基准货币可兑换的数量} 构造"""
+        quoted = np.array([quotes.get(c, np.nan) for c in currencies], dtype='float64')
+        return cls(currencies, 1.0 / quoted)
+
+    def indices(self, codes):
+        """货币代码数组对应的行列号，不支持的货币为 -1"""
+        return np.array([self.index.get(code, -1) for code in codes], dtype='int64')
+
+    def rate(self, base, target):
+        """1 单位 base 兑换的 target 数量；不支持的货币或缺少汇率时返回 None"""
+        i, j = self.index.get(base), self.index.get(target)
+        if i is None or j is None or np.isnan(self.values[i, j]):
+            return None
+        return float(self.values[i, j])
+
+    def rates(self, bases, targets):
+        """批量取汇率，返回数组；不支持的货币对为 NaN"""
+        i, j = self.indices(bases), self.indices(targets)
+        valid = (i >= 0) & (j >= 0)
+        result = np.full(len(i), np.nan)
+        result[valid] = self.values[i[valid], j[valid]]
+        return result
+
+    def convert(self, amounts, bases, targets):
+        """批量换算金额：amounts[k] 单位 bases[k] 兑换的 targets[k] 数量"""
+        return np.asarray(amounts, dtype='float64') * self.rates(bases, targets)
+
+    def with_quotes(self, quotes):
+        """返回覆盖了指定货币对报价的新矩阵 {(base, target): 汇率}，反向货币对取倒数，
+        其余货币对仍由基准向量换算"""
+        matrix = CrossRateMatrix(self.currencies, self.base_values)
+        for (base, target), rate in quotes.items():
+            i, j = self.index[base], self.index[target]
+            matrix.values[i, j] = rate
+            matrix.values[j, i] = 1.0 / rate
+        return matrix
+
+    def column(self, target):
+        """所有支持货币兑换 target 的汇率 {货币: 汇率}"""
+        j = self.index[target]
+        return {currency: float(self.values[i, j]) for i, currency in enumerate(self.currencies)
+                if not np.isnan(self.values[i, j])}
+
+
+def fallback_matrix(currencies=None, quotes=None):
+    """由备用人民币汇率构造的交叉汇率矩阵，quotes 为后端自己的货币对报价 {(base, target): 汇率}"""
+    matrix = CrossRateMatrix.from_reference_rates(FALLBACK_CNY_RATES, currencies)
+    return matrix.with_quotes(quotes) if quotes else matrix
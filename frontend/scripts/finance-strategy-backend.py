@@ -6,15 +6,31 @@ import random
 from datetime import datetime, timedelta
 import numpy as np
 
+from cross_rates import fallback_matrix
+
 app = Flask(__name__)
 CORS(app)
 
+# 本后端原有示例汇率中与共用表不同的报价，保持原值
+FALLBACK_QUOTES = {
+    ('JPY', 'CNY'): 0.0543,
+    ('CNY', 'KRW'): 185.67,
+    ('USD', 'EUR'): 0.9123,
+    ('USD', 'GBP'): 0.7891,
+    ('USD', 'JPY'): 149.23,
+    ('USD', 'AUD'): 1.5234,
+    ('USD', 'CAD'): 1.3567,
+    ('USD', 'CHF'): 0.8901,
+    ('USD', 'HKD'): 7.8234,
+}
+
 # 这里是你的策略分析核心逻辑区域
 # 你可以在这里实现你自己的金融分析算法
 
 class CurrencyStrategyAnalyzer:
     def __init__(self):
         self.supported_currencies = ['USD', 'EUR', 'GBP', 'JPY', 'CNY', 'KRW', 'AUD', 'CAD', 'CHF', 'HKD']
+        self.rates = fallback_matrix(self.supported_currencies, FALLBACK_QUOTES)
         
     def analyze_strategy(self, amount, from_currency, to_currency, analysis_type='COMPREHENSIVE'):
         """
@@ -254,14 +270,8 @@ class CurrencyStrategyAnalyzer:
     
     def _get_current_rate(self, from_currency, to_currency):
         """获取当前汇率 - 在这里接入实时汇率API"""
-        # 示例汇率
-        rates = {
-            'USDCNY': 7.2345,
-            'EURCNY': 7.8901,
-            'GBPCNY': 9.1234,
-            'JPYCNY': 0.0543,
-        }
-        return rates.get(f'{from_currency}{to_currency}', 1.0)
+        # 示例汇率，由共用的交叉汇率矩阵换算
+        return self.rates.rate(from_currency, to_currency) or 1.0
 
 # 创建分析器实例
 analyzer = CurrencyStrategyAnalyzer()
@@ -316,20 +326,14 @@ def get_current_rates():
     """获取当前汇率"""
     try:
         # 在这里实现你的实时汇率获取逻辑
-        rates = {
-            'USDCNY': 7.2345 + random.uniform(-0.01, 0.01),
-            'EURCNY': 7.8901 + random.uniform(-0.01, 0.01),
-            'GBPCNY': 9.1234 + random.uniform(-0.01, 0.01),
-            'JPYCNY': 0.0543 + random.uniform(-0.0001, 0.0001),
-            'CNYKRW': 185.67 + random.uniform(-1, 1),
-            'USDEUR': 0.9123 + random.uniform(-0.001, 0.001),
-            'USDGBP': 0.7891 + random.uniform(-0.001, 0.001),
-            'USDJPY': 149.23 + random.uniform(-0.5, 0.5),
-            'USDAUD': 1.5234 + random.uniform(-0.01, 0.01),
-            'USDCAD': 1.3567 + random.uniform(-0.01, 0.01),
-            'USDCHF': 0.8901 + random.uniform(-0.001, 0.001),
-            'USDHKD': 7.8234 + random.uniform(-0.01, 0.01),
-        }
+        pairs = [('USD', 'CNY'), ('EUR', 'CNY'), ('GBP', 'CNY'), ('JPY', 'CNY'), ('CNY', 'KRW'),
+                 ('USD', 'EUR'), ('USD', 'GBP'), ('USD', 'JPY'), ('USD', 'AUD'), ('USD', 'CAD'),
+                 ('USD', 'CHF'), ('USD', 'HKD')]
+        bases, targets = zip(*pairs)
+        # 整批货币对一次查表，附加±0.1%的随机波动
+        values = analyzer.rates.rates(bases, targets)
+        values = values * (1 + np.random.uniform(-0.001, 0.001, len(values)))
+        rates = {f'{base}{target}': value for base, target, value in zip(bases, targets, values.tolist())}
         
         return jsonify({
             'rates': rates,
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+FinBERT 的 ONNX Runtime 推理
+把 ProsusAI/finbert 导出为 ONNX（可选 int8 动态量化），推理时不需要 PyTorch 前向计算，
+CPU 上每核每秒能处理的文章数明显高于 transformers 流水线；
+OnnxTextClassifier 与 text-classification 流水线的调用方式和返回格式一致，
+可以直接替换 SentimentPipeline 的 scorer
+
+用法:
+    python3 finbert_onnx.py                # 导出 FP32 和 int8 模型到 finbert_onnx/
+    python3 finbert_onnx.py --force        # 重新导出
+"""
+
+import os
+import sys
+import json
+import types
+import argparse
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FINBERT_MODEL = 'ProsusAI/finbert'
+DEFAULT_ONNX_DIR = os.path.join(SCRIPT_DIR, 'finbert_onnx')
+FP32_FILENAME = 'model.onnx'
+INT8_FILENAME = 'model.int8.onnx'
+EXPORT_INFO_FILENAME = 'export.json'
+MAX_LENGTH = 512
+
+# pytorch：transformers 流水线；onnx：ONNX Runtime FP32；onnx-int8：动态量化后的 int8 模型
+RUNTIMES = ('pytorch', 'onnx', 'onnx-int8')
+
+
+def onnx_path(model_dir, quantized=False):
+    return os.path.join(model_dir, INT8_FILENAME if quantized else FP32_FILENAME)
+
+
+def export_finbert(model_dir=DEFAULT_ONNX_DIR, model_name=FINBERT_MODEL, quantize=True, opset=14):
+    """导出 FinBERT 为 ONNX（输入的批大小和序列长度可变），quantize 时同时生成 int8 动态量化模型"""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+
+    sample = tokenizer(['FinBERT export sample'], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    fp32_path = onnx_path(model_dir)
+    tmp_path = fp32_path + '.tmp'
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[name] for name in input_names), tmp_path,
+            input_names=input_names, output_names=['logits'],
+            dynamic_axes={**{name: {0: 'batch', 1: 'sequence'} for name in input_names},
+                          'logits': {0: 'batch'}},
+            opset_version=opset,
+        )
+    os.replace(tmp_path, fp32_path)
+    # 分词器和 config.json（含 id2label）与模型放在一起，推理时不需要再访问模型仓库
+    tokenizer.save_pretrained(model_dir)
+    model.config.save_pretrained(model_dir)
+    print(f"Exported ONNX model: {fp32_path}", file=sys.stderr)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_path = onnx_path(model_dir, quantized=True)
+        tmp_path = int8_path + '.tmp'
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+        print(f"Exported int8 ONNX model: {int8_path}", file=sys.stderr)
+
+    with open(os.path.join(model_dir, EXPORT_INFO_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump({'model': model_name, 'opset': opset, 'quantized': quantize}, f, indent=2)
+    return fp32_path
+
+
+class OnnxTextClassifier:
+    """ONNX Runtime 上的文本分类，调用方式与 transformers 的 text-classification 流水线相同"""
+
+    def __init__(self, model_dir=DEFAULT_ONNX_DIR, quantized=False, intra_op_threads=None):
+        from transformers import AutoTokenizer, AutoConfig
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        config = AutoConfig.from_pretrained(model_dir)
+        self.labels = [config.id2label[i] for i in range(len(config.id2label))]
+        with open(os.path.join(model_dir, EXPORT_INFO_FILENAME), encoding='utf-8') as f:
+            source_model = json.load(f)['model']
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(onnx_path(model_dir, quantized), options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        # 与 transformers 流水线一样提供 model.name_or_path，量化模型的缓存版本与 FP32 区分开
+        self.model = types.SimpleNamespace(
+            name_or_path=f"{source_model}@onnx{'-int8' if quantized else ''}")
+
+    def _logits(self, texts, truncation):
+        encoded = self.tokenizer(texts, padding=True, truncation=truncation, max_length=MAX_LENGTH,
+                                 return_tensors='np')
+        feeds = {name: encoded[name].astype('int64') for name in self.input_names}
+        return self.session.run(['logits'], feeds)[0]
+
+    def __call__(self, texts, batch_size=32, return_all_scores=False, truncation=True, **kwargs):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        results = []
+        for start in range(0, len(texts), batch_size):
+            logits = self._logits(texts[start:start + batch_size], truncation)
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+            for row in probabilities:
+                all_scores = [{'label': label, 'score': float(p)} for label, p in zip(self.labels, row)]
+                results.append(all_scores if return_all_scores else max(all_scores, key=lambda r: r['score']))
+        # 与流水线相同：单条文本也返回列表，return_all_scores 时为 [[{...}, ...]]
+        return results
+
+
+def load_scorer(runtime='pytorch', model_dir=DEFAULT_ONNX_DIR, model_name=FINBERT_MODEL):
+    """按运行时创建 FinBERT 打分器；ONNX 模型不存在时先导出"""
+    if runtime not in RUNTIMES:
+        raise ValueError(f'Unknown sentiment runtime: {runtime} (expected one of {RUNTIMES})')
+    if runtime == 'pytorch':
+        from transformers import pipeline
+        return pipeline("text-classification", model=model_name)
+
+    if not ONNX_AVAILABLE:
+        raise RuntimeError('onnxruntime is not installed')
+    quantized = runtime == 'onnx-int8'
+    if not os.path.exists(onnx_path(model_dir, quantized)):
+        export_finbert(model_dir, model_name, quantize=quantized)
+    return OnnxTextClassifier(model_dir, quantized)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导出 FinBERT 为 ONNX 格式')
+    parser.add_argument('--output', default=DEFAULT_ONNX_DIR, help='导出目录')
+    parser.add_argument('--model', default=FINBERT_MODEL)
+    parser.add_argument('--opset', type=int, default=14)
+    parser.add_argument('--no-quantize', action='store_true', help='不生成 int8 量化模型')
+    parser.add_argument('--force', action='store_true', help='已导出也重新导出')
+    args = parser.parse_args()
+
+    if not args.force and os.path.exists(onnx_path(args.output)) and (
+            args.no_quantize or os.path.exists(onnx_path(args.output, quantized=True))):
+        print(f"ONNX model already exported: {args.output}", file=sys.stderr)
+        return
+    export_finbert(args.output, args.model, quantize=not args.no_quantize, opset=args.opset)
+
+
+if __name__ == '__main__':
+    main()
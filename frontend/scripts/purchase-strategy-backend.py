@@ -4,10 +4,19 @@ import json
 import time
 import random
 from datetime import datetime, timedelta
+import numpy as np
+
+from cross_rates import fallback_matrix
 
 app = Flask(__name__)
 CORS(app)
 
+# 本后端原有备用汇率中与共用表不同的报价，保持原值
+FALLBACK_QUOTES = {
+    ('JPY', 'CNY'): 0.0543,
+    ('KRW', 'CNY'): 0.0055,
+}
+
 class PurchaseStrategyAnalyzer:
     def __init__(self):
         self.supported_currencies = ['USD', 'EUR', 'GBP', 'JPY', 'CNY', 'KRW', 'AUD', 'CAD', 'CHF', 'HKD', 'SGD', 'THB', 'MYR', 'VND', 'PHP']
@@ -96,24 +105,8 @@ class PurchaseStrategyAnalyzer:
             }
         }
         
-        # 货币汇率 (相对于人民币)
-        self.exchange_rates = {
-            'USD': 7.2345,
-            'EUR': 7.8901,
-            'GBP': 9.1234,
-            'JPY': 0.0543,
-            'CNY': 1.0000,
-            'KRW': 0.0055,
-            'AUD': 4.8567,
-            'CAD': 5.3421,
-            'CHF': 8.1234,
-            'HKD': 0.9234,
-            'SGD': 5.4321,
-            'THB': 0.2012,
-            'MYR': 1.5432,
-            'VND': 0.0003,
-            'PHP': 0.1287
-        }
+        # 货币汇率 (相对于人民币)，共用交叉汇率矩阵
+        self.rates = fallback_matrix(self.supported_currencies, FALLBACK_QUOTES)
     
     def analyze_purchase_strategy(self, purchase_request):
         """
@@ -202,7 +195,7 @@ class PurchaseStrategyAnalyzer:
         """计算特定渠道的策略详情"""
         
         # 获取基础汇率
-        base_rate = self.exchange_rates.get(to_currency, 1.0)
+        base_rate = self.rates.rate(to_currency, 'CNY') or 1.0
         
         # 应用渠道汇率修正
         final_rate = base_rate * channel['base_rate_modifier']
@@ -218,7 +211,7 @@ class PurchaseStrategyAnalyzer:
             total_cost = foreign_amount + fee_amount
         else:
             # 从外币兑换到人民币或其他外币
-            cny_amount = amount * self.exchange_rates.get(from_currency, 1.0)
+            cny_amount = amount * (self.rates.rate(from_currency, 'CNY') or 1.0)
             foreign_amount = cny_amount / final_rate
             fee_amount = foreign_amount * fee_rate / 100
             total_cost = foreign_amount + fee_amount
@@ -416,11 +409,11 @@ def analyze_purchase_strategy():
 def get_exchange_rates():
     """获取当前汇率"""
     try:
-        # 添加一些随机波动
-        current_rates = {}
-        for currency, rate in analyzer.exchange_rates.items():
-            fluctuation = random.uniform(-0.01, 0.01)  # ±1%波动
-            current_rates[currency] = round(rate * (1 + fluctuation), 4)
+        # 添加一些随机波动（±1%），对整列汇率一次计算
+        currencies = analyzer.rates.currencies
+        cny_rates = analyzer.rates.rates(currencies, ['CNY'] * len(currencies))
+        fluctuated = np.round(cny_rates * (1 + np.random.uniform(-0.01, 0.01, len(currencies))), 4)
+        current_rates = dict(zip(currencies, fluctuated.tolist()))
         
         return jsonify({
             'rates': current_rates,
@@ -436,8 +429,9 @@ def get_supported_currencies():
     """获取支持的货币列表"""
     try:
         currencies_info = []
+        cny_rates = analyzer.rates.column('CNY')
         for code in analyzer.supported_currencies:
-            rate = analyzer.exchange_rates.get(code, 1.0)
+            rate = cny_rates.get(code, 1.0)
             currencies_info.append({
                 'code': code,
                 'rate': rate,
@@ -0,0 +1,468 @@
+"""
+实时汇率异步获取器
+所有汇率源共用一个 aiohttp 连接池，向各个汇率源竞争请求完整汇率表，
+取第一个有效结果并取消其余请求；Flask 同步接口通过后台事件循环线程调用
+
+汇率表按基准货币缓存（带TTL），同一基准货币的并发未命中只触发一次上游请求，
+任意货币对都由缓存的USD汇率表换算，每个TTL窗口内上游请求次数与访问量无关；
+后台定时任务可以按固定间隔刷新所有支持货币的交叉汇率矩阵，请求处理只读内存中的矩阵
+
+每个汇率源记录最近请求的成功率和耗时：连续失败的汇率源熔断一段时间直接跳过，
+其余按观测耗时排序，先请求最快的，慢或失败时再启动下一个
+
+汇率源地址可通过构造参数替换，便于用本地桩服务器测试
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+
+import aiohttp
+import numpy as np
+
+from cross_rates import CrossRateMatrix
+
+EXCHANGERATE_API_URL = 'https://api.exchangerate-api.com/v4/latest/{base}'
+FIXER_URL = 'https://api.fixer.io/latest?base={base}'
+CURRENCYLAYER_URL = 'https://apilayer.net/api/live?access_key=free&source={base}&format=1'
+
+
+def _rates_parser(data, base):
+    return data.get('rates', {})
+
+
+def _quotes_parser(data, base):
+    # currencylayer 的报价键为 基准货币+目标货币，如 USDJPY
+    return {key[len(base):]: value for key, value in data.get('quotes', {}).items()
+            if key.startswith(base)}
+
+
+class RateProvider:
+    """单个汇率源：URL模板和响应解析函数（返回 {货币: 汇率} 汇率表）"""
+
+    def __init__(self, name, url_template, parser=_rates_parser):
+        self.name = name
+        self.url_template = url_template
+        self.parser = parser
+
+    def url(self, base):
+        return self.url_template.format(base=base)
+
+
+def default_providers():
+    return [
+        RateProvider('exchangerate-api', EXCHANGERATE_API_URL),
+        RateProvider('fixer.io', FIXER_URL),
+        RateProvider('currencylayer', CURRENCYLAYER_URL, _quotes_parser),
+    ]
+
+
+def _valid_rate(rate):
+    return isinstance(rate, (int, float)) and not isinstance(rate, bool) and rate > 0
+
+
+class ProviderHealth:
+    """单个汇率源的健康状态：最近若干次请求的成功率和耗时，以及熔断状态
+
+    closed：正常请求；连续失败 failure_threshold 次或窗口内错误率过高时进入 open，
+    cooldown 秒内直接跳过该汇率源；冷却结束后进入 half_open，只放行一个试探请求，
+    成功则恢复 closed，失败则重新 open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, window=50, failure_threshold=3, error_rate_threshold=0.5,
+                 min_samples=10, cooldown=30):
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.requests = 0
+        self.cancelled = 0
+        self.skipped = 0
+
+    def allow(self):
+        """是否可以向该汇率源发请求；冷却结束后放行一个试探请求"""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, ok, latency):
+        self.requests += 1
+        self.samples.append((ok, latency))
+        self.trial_in_flight = False
+        if ok:
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            return
+        self.consecutive_failures += 1
+        if (self.state == self.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+                or (len(self.samples) >= self.min_samples
+                    and self.error_rate() > self.error_rate_threshold)):
+            if self.state != self.OPEN:
+                logging.warning(f"汇率源 {self.name} 熔断 {self.cooldown}s：连续失败 {self.consecutive_failures} 次，"
+                                f"错误率 {self.error_rate():.0%}")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self, elapsed=None):
+        """请求被取消（其他汇率源已先返回）时不计成败，只释放试探名额
+
+        elapsed 为取消前已等待的秒数，作为该汇率源耗时的下限计入耗时样本，
+        否则从不返回的汇率源永远没有耗时样本，会一直被排在最前面
+        """
+        self.trial_in_flight = False
+        if elapsed is not None:
+            self.cancelled += 1
+            self.samples.append((None, elapsed))
+
+    def _completed(self):
+        return [ok for ok, _ in self.samples if ok is not None]
+
+    def error_rate(self):
+        completed = self._completed()
+        if not completed:
+            return 0.0
+        return completed.count(False) / len(completed)
+
+    def latency(self, q):
+        """耗时的 q 分位数（秒，含被取消请求的已等待时间，不含失败请求），尚无样本时返回 None"""
+        latencies = [latency for ok, latency in self.samples if ok is not False]
+        if not latencies:
+            return None
+        return float(np.percentile(latencies, q))
+
+    def sort_key(self):
+        """排序依据：高错误率的排后面，其余按中位耗时升序；没有样本的汇率源优先试探"""
+        median = self.latency(50)
+        return (self.error_rate() > self.error_rate_threshold, median if median is not None else 0.0)
+
+    def stats(self):
+        p50, p95 = self.latency(50), self.latency(95)
+        return {
+            'state': self.state,
+            'requests': self.requests,
+            'cancelled': self.cancelled,
+            'skipped': self.skipped,
+            'success_rate': round(1 - self.error_rate(), 3) if self._completed() else None,
+            'consecutive_failures': self.consecutive_failures,
+            'p50_latency_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_latency_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class RateSnapshot:
+    """某一基准货币的汇率表快照"""
+
+    def __init__(self, base, source, rates):
+        self.base = base
+        self.source = source
+        self.rates = {symbol: float(rate) for symbol, rate in rates.items() if _valid_rate(rate)}
+        self.rates[base] = 1.0
+        self.fetched_at = time.time()
+        self._fetched_monotonic = time.monotonic()
+
+    def age(self):
+        return time.monotonic() - self._fetched_monotonic
+
+    def cross(self, base, target):
+        """由本快照换算 base/target 汇率，缺少任一货币时返回 None"""
+        if base not in self.rates or target not in self.rates:
+            return None
+        return self.rates[target] / self.rates[base]
+
+
+class RateMatrix(CrossRateMatrix):
+    """由某次下载的中转货币汇率表构造的交叉汇率矩阵，记录数据来源和时间"""
+
+    def __init__(self, currencies, snapshot):
+        quoted = CrossRateMatrix.from_quote_table(currencies, snapshot.rates)
+        super().__init__(quoted.currencies, quoted.base_values)
+        self.source = snapshot.source
+        self.pivot = snapshot.base
+        self.updated_at = snapshot.fetched_at
+        self.snapshot = snapshot
+
+    def age(self):
+        """距离所用汇率表实际下载的秒数（刷新失败沿用旧汇率表时继续增长）"""
+        return self.snapshot.age()
+
+
+class RateFetcher:
+    def __init__(self, providers=None, timeout=5, pool_size=20, ttl=60, pivot='USD',
+                 hedge_delay=0.3, cooldown=30):
+        self.providers = providers or default_providers()
+        self.timeout = timeout
+        # 按观测耗时排序后先请求最快的汇率源，hedge_delay 秒内未返回或已失败再启动下一个
+        self.hedge_delay = hedge_delay
+        self.health = {p.name: ProviderHealth(p.name, cooldown=cooldown) for p in self.providers}
+        self.pool_size = pool_size
+        self.ttl = ttl
+        # 交叉汇率统一由该货币的汇率表换算
+        self.pivot = pivot
+        self._loop = None
+        self._session = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # 以下状态只在事件循环线程中访问
+        self._snapshots = {}
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+        # 后台刷新的交叉汇率矩阵，整体替换，读取时不需要加锁
+        self.matrix = None
+        self.refresh_interval = None
+        self._scheduler = None
+
+    def _ensure_started(self):
+        """首次使用时启动后台事件循环线程并创建共享会话"""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='rate-fetcher', daemon=True)
+            thread.start()
+
+            async def create_session():
+                connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+                return aiohttp.ClientSession(connector=connector,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+            self._session = asyncio.run_coroutine_threadsafe(create_session(), loop).result()
+            self._loop, self._thread = loop, thread
+
+    def _run(self, coroutine, lookups=1):
+        """在后台事件循环中执行协程并等待结果
+
+        lookups 为协程依次等待的汇率表刷新次数，每次刷新各有一个请求超时的时间
+        """
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(lookups * (self.timeout + 1))
+        except Exception:
+            future.cancel()
+            raise
+
+    async def _get_json(self, url):
+        async with self._session.get(url) as response:
+            if response.status != 200:
+                raise RuntimeError(f'HTTP {response.status}')
+            return await response.json(content_type=None)
+
+    async def _from_provider(self, provider, base):
+        data = await self._get_json(provider.url(base))
+        rates = provider.parser(data, base)
+        if not rates or not any(_valid_rate(rate) for rate in rates.values()):
+            raise ValueError('empty rate table')
+        return provider.name, rates
+
+    async def _timed(self, provider, base):
+        """请求单个汇率源并记录成功/失败和耗时"""
+        health = self.health[provider.name]
+        started = time.monotonic()
+        try:
+            result = await self._from_provider(provider, base)
+        except asyncio.CancelledError:
+            health.release(time.monotonic() - started)
+            raise
+        except Exception as e:
+            health.record(False, time.monotonic() - started)
+            raise RuntimeError(f'{provider.name}: {e}') from e
+        health.record(True, time.monotonic() - started)
+        return result
+
+    def _ordered_providers(self):
+        """跳过熔断中的汇率源，其余按观测耗时排序"""
+        ordered = sorted(self.providers, key=lambda p: self.health[p.name].sort_key())
+        return [p for p in ordered if self.health[p.name].allow()]
+
+    async def race(self, base):
+        """按观测耗时依次启动汇率源请求，返回第一个有效的 (来源, 汇率表)；全部失败返回 None
+
+        上一个汇率源失败时立即启动下一个，hedge_delay 秒内未返回时也提前启动下一个并行竞争，
+        熔断中的汇率源不再占用超时时间
+        """
+        self.upstream_calls += 1
+        queue = self._ordered_providers()
+        if not queue:
+            logging.warning(f"所有汇率源均处于熔断状态 {base}")
+            return None
+        tasks = []
+        running = set()
+
+        def launch():
+            task = asyncio.ensure_future(self._timed(queue.pop(0), base))
+            tasks.append(task)
+            running.add(task)
+
+        launch()
+        try:
+            while running:
+                done, running = await asyncio.wait(
+                    running, timeout=self.hedge_delay if queue else None,
+                    return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        logging.warning(f"汇率源请求失败 {base}: {e}")
+                if queue:
+                    launch()
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+            # 未启动的汇率源归还半开状态的试探名额
+            for provider in queue:
+                self.health[provider.name].release()
+
+    async def snapshot(self, base, force=False):
+        """返回 base 的汇率表快照；过期或缺失时刷新，并发刷新合并为一次上游请求"""
+        cached = self._snapshots.get(base)
+        if not force and cached is not None and cached.age() < self.ttl:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        inflight = self._inflight.get(base)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._refresh(base))
+            self._inflight[base] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(base, None))
+        # shield：单个调用方超时取消时不影响其他等待同一刷新的调用方
+        return await asyncio.shield(inflight)
+
+    async def _refresh(self, base):
+        result = await self.race(base)
+        if result is None:
+            # 刷新失败时继续使用过期快照
+            return self._snapshots.get(base)
+        snapshot = RateSnapshot(base, *result)
+        self._snapshots[base] = snapshot
+        return snapshot
+
+    async def rate(self, base, target):
+        """base/target 汇率：优先由中转货币汇率表换算，缺少货币时再请求 base 自身的汇率表"""
+        for table_base in dict.fromkeys([self.pivot, base]):
+            snapshot = await self.snapshot(table_base)
+            rate = snapshot.cross(base, target) if snapshot else None
+            if rate is not None:
+                source = snapshot.source if table_base == base else f'{snapshot.source} via {table_base}'
+                return source, rate
+        return None
+
+    async def _refresh_loop(self, currencies, interval):
+        while True:
+            try:
+                snapshot = await self.snapshot(self.pivot, force=True)
+                if snapshot is not None and (self.matrix is None or self.matrix.snapshot is not snapshot):
+                    self.matrix = RateMatrix(currencies, snapshot)
+                    logging.info(f"交叉汇率矩阵已刷新: {len(currencies)} 种货币，来源 {snapshot.source}")
+            except Exception as e:
+                logging.warning(f"交叉汇率矩阵刷新失败: {e}")
+            await asyncio.sleep(interval)
+
+    def start_scheduler(self, currencies, interval=60):
+        """启动后台定时刷新任务，按 interval 秒刷新 currencies 之间的交叉汇率矩阵"""
+        self._ensure_started()
+        self.refresh_interval = interval
+
+        async def start():
+            if self._scheduler is None or self._scheduler.done():
+                self._scheduler = asyncio.ensure_future(self._refresh_loop(list(currencies), interval))
+
+        asyncio.run_coroutine_threadsafe(start(), self._loop).result()
+
+    def stop_scheduler(self):
+        """停止后台定时刷新任务"""
+        if self._loop is not None and self._scheduler is not None:
+            self._loop.call_soon_threadsafe(self._scheduler.cancel)
+            self._scheduler = None
+
+    def is_stale(self, matrix):
+        """超过3个刷新周期（未启动定时任务时为3个TTL）未更新即视为过期"""
+        return matrix.age() > 3 * (self.refresh_interval or self.ttl)
+
+    def cached_rate(self, base, target):
+        """只读内存中的汇率矩阵，不做网络请求
+
+        返回 {'source', 'rate', 'updated_at', 'stale'}；矩阵尚未生成或不含该货币对时返回 None
+        """
+        matrix = self.matrix
+        if matrix is None:
+            return None
+        rate = matrix.rate(base, target)
+        if rate is None:
+            return None
+        return {
+            'source': f'{matrix.source} via {matrix.pivot}',
+            'rate': rate,
+            'updated_at': matrix.updated_at,
+            'stale': self.is_stale(matrix),
+        }
+
+    def fetch(self, base, target):
+        """同步接口：返回 (来源, 汇率)，全部失败或超时返回 None"""
+        try:
+            # 中转货币汇率表缺少该货币时还要再请求 base 自身的汇率表
+            return self._run(self.rate(base, target), lookups=len({self.pivot, base}))
+        except Exception as e:
+            logging.warning(f"实时汇率获取失败 {base}/{target}: {e}")
+            return None
+
+    def get_snapshot(self, base):
+        """同步接口：返回 base 的汇率表快照，失败返回 None"""
+        try:
+            return self._run(self.snapshot(base))
+        except Exception as e:
+            logging.warning(f"汇率表获取失败 {base}: {e}")
+            return None
+
+    def stats(self):
+        """缓存统计"""
+        matrix = self.matrix
+        return {
+            'matrix': {
+                'currencies': len(matrix.currencies),
+                'age': round(matrix.age(), 1),
+                'stale': self.is_stale(matrix),
+                'refresh_interval': self.refresh_interval,
+            } if matrix is not None else None,
+            'ttl': self.ttl,
+            'pivot': self.pivot,
+            'hits': self.hits,
+            'misses': self.misses,
+            'upstream_calls': self.upstream_calls,
+            'snapshots': {base: {'source': s.source, 'age': round(s.age(), 1), 'symbols': len(s.rates)}
+                          for base, s in list(self._snapshots.items())},
+            'providers': {name: health.stats() for name, health in self.health.items()},
+        }
+
+    def close(self):
+        """关闭连接池和后台事件循环"""
+        if self._loop is None:
+            return
+        self.stop_scheduler()
+        asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = self._session = self._thread = None
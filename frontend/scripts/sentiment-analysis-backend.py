@@ -1,8 +1,16 @@
 import os
+import time
 import logging
+import threading
+
+# 启动计时起点：进程导入本模块的时刻
+STARTED_AT = time.perf_counter()
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from transformers import pipeline
+
+from sentiment_cache import SentimentCache
+from sentiment_pipeline import SentimentPipeline, MODES
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,22 +22,202 @@ os.environ["TRANSFORMERS_NO_TF"] = "1"
 app = Flask(__name__)
 CORS(app) # Enable CORS for all origins
 
-# Load models globally to avoid reloading on each request
-try:
-    logger.info("开始加载AI模型...")
-    Scorer = pipeline("text-classification", model="ProsusAI/finbert")
-    Summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-    logger.info("模型加载成功: FinBERT and BART-large-cnn")
-except Exception as e:
-    logger.error(f"模型加载失败: {e}")
-    Scorer = None
-    Summarizer = None
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# FinBERT 推理运行时：pytorch（默认）、onnx、onnx-int8（动态量化），ONNX 模型不存在时启动时导出
+SENTIMENT_RUNTIME = os.environ.get('SENTIMENT_RUNTIME', 'pytorch')
+FINBERT_ONNX_DIR = os.environ.get('FINBERT_ONNX_DIR', os.path.join(SCRIPT_DIR, 'finbert_onnx'))
+
+# FinBERT 每次前向计算的文本数（同批文本按长度分桶，填充到相近长度）
+SCORE_BATCH_SIZE = int(os.environ.get('SCORE_BATCH_SIZE', 32))
+# BART 每次摘要的文档数
+SUMMARY_BATCH_SIZE = int(os.environ.get('SUMMARY_BATCH_SIZE', 8))
+# /score_batch 单次请求最多接受的文本数
+MAX_BATCH_TEXTS = int(os.environ.get('MAX_BATCH_TEXTS', 2000))
+
+# 超过 FinBERT 512 token 上限的长文本：chunk 切成重叠窗口打分后加权平均（默认），summarize 先用 BART 摘要
+SENTIMENT_MODE = os.environ.get('SENTIMENT_MODE', 'chunk')
+if SENTIMENT_MODE not in MODES:
+    raise ValueError(f'Unknown SENTIMENT_MODE: {SENTIMENT_MODE} (expected one of {MODES})')
+# 相邻窗口重叠的 token 数
+CHUNK_STRIDE = int(os.environ.get('CHUNK_STRIDE', 64))
+
+# 1（默认）：服务启动后立即在后台线程加载模型；0：收到第一个打分请求时才加载
+SENTIMENT_PRELOAD = os.environ.get('SENTIMENT_PRELOAD', '1') != '0'
+# 模型尚未就绪时打分请求最多等待的秒数，超时返回 503
+MODEL_WAIT_TIMEOUT = float(os.environ.get('MODEL_WAIT_TIMEOUT', 30))
+
+# 情感分析结果缓存：内存 LRU + SQLite，SENTIMENT_CACHE_PATH 设为空字符串时只用内存
+sentiment_cache = SentimentCache(
+    path=os.environ.get('SENTIMENT_CACHE_PATH', os.path.join(SCRIPT_DIR, 'sentiment_cache', 'sentiment.sqlite3')) or None,
+    max_entries=int(os.environ.get('SENTIMENT_CACHE_SIZE', 10000)),
+)
+
+# 模型在后台线程加载，HTTP 服务先启动，/health/live 在加载期间即可访问；
+# 只有 summarize 模式才加载 BART
+Scorer = None
+Summarizer = None
+sentiment_pipeline = None
+models_ready = threading.Event()
+model_state = {'status': 'not_started', 'error': None, 'timings': {}}
+_load_lock = threading.Lock()
+_load_thread = None
+
+
+def load_models():
+    """加载 FinBERT（以及 summarize 模式下的 BART），预热一次并记录各阶段耗时"""
+    global Scorer, Summarizer, sentiment_pipeline, SENTIMENT_RUNTIME
+    timings = model_state['timings']
+    model_state['status'] = 'loading'
+    try:
+        logger.info("开始加载AI模型...")
+        started = time.perf_counter()
+        from finbert_onnx import load_scorer
+        timings['import'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        try:
+            scorer = load_scorer(SENTIMENT_RUNTIME, FINBERT_ONNX_DIR)
+        except Exception as e:
+            if SENTIMENT_RUNTIME == 'pytorch':
+                raise
+            logger.error(f"FinBERT {SENTIMENT_RUNTIME} 运行时加载失败，改用 pytorch: {e}")
+            SENTIMENT_RUNTIME = 'pytorch'
+            scorer = load_scorer('pytorch')
+        timings['finbert'] = time.perf_counter() - started
+
+        summarizer = None
+        if SENTIMENT_MODE == 'summarize':
+            from transformers import pipeline
+            started = time.perf_counter()
+            summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+            timings['bart'] = time.perf_counter() - started
+
+        # 预热一次，第一个真实请求不承担初始化开销
+        started = time.perf_counter()
+        scorer(['Markets were steady today.'], return_all_scores=True, truncation=True)
+        timings['warmup'] = time.perf_counter() - started
+
+        # Max_length for BART-large-cnn is 1024 tokens; we want a summary that FinBERT can handle, so aiming for < 512 tokens.
+        sentiment_pipeline = SentimentPipeline(
+            scorer, summarizer, mode=SENTIMENT_MODE, max_tokens=512, chunk_stride=CHUNK_STRIDE,
+            summary_max_length=200, summary_min_length=50,
+            batch_size=SCORE_BATCH_SIZE, summary_batch_size=SUMMARY_BATCH_SIZE,
+            cache=sentiment_cache,
+        )
+        Scorer, Summarizer = scorer, summarizer
+        timings['ready_since_start'] = time.perf_counter() - STARTED_AT
+        model_state['status'] = 'ready'
+        loaded = f"FinBERT ({SENTIMENT_RUNTIME})" + (" and BART-large-cnn" if summarizer is not None else "")
+        logger.info(f"模型加载成功: {loaded}，启动耗时: " +
+                    "，".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    except Exception as e:
+        logger.error(f"模型加载失败: {e}")
+        model_state['status'] = 'failed'
+        model_state['error'] = str(e)
+    finally:
+        models_ready.set()
+
+
+def start_loading():
+    """启动后台加载线程（只启动一次）"""
+    global _load_thread
+    with _load_lock:
+        if _load_thread is None:
+            _load_thread = threading.Thread(target=load_models, name='model-loader', daemon=True)
+            _load_thread.start()
+
+
+def ensure_models():
+    """打分请求前调用：触发加载并最多等待 MODEL_WAIT_TIMEOUT 秒，未就绪时返回错误响应"""
+    start_loading()
+    models_ready.wait(MODEL_WAIT_TIMEOUT)
+    if model_state['status'] == 'ready':
+        return None
+    if model_state['status'] == 'failed':
+        logger.error("AI模型未加载，无法处理请求")
+        return jsonify({"error": "AI models not loaded. Please check server logs for details.",
+                        "detail": model_state['error']}), 500
+    logger.warning("AI模型仍在加载中，请稍后重试")
+    return jsonify({"error": "AI models are still loading. Please retry shortly."}), 503, {'Retry-After': '5'}
+
+
+def format_scores(all_scores):
+    """把 FinBERT 的三个类别分数整理成接口返回格式"""
+    # FinBERT returns all 3 sentiment scores when return_all_scores=True
+    # Format: [{'label': 'positive', 'score': 0.898}, {'label': 'neutral', 'score': 0.067}, {'label': 'negative', 'score': 0.034}]
+    sentiment_scores = {}
+    main_sentiment = None
+    main_score = 0
+
+    # 提取所有情感分数并找到最高分
+    for result in all_scores:
+        label = result['label'].lower()
+        score = result['score']
+        sentiment_scores[label] = score
+
+        if score > main_score:
+            main_score = score
+            main_sentiment = result['label']
+
+    # 确保所有三个类别都存在
+    positive_score = sentiment_scores.get('positive', 0.0)
+    neutral_score = sentiment_scores.get('neutral', 0.0)
+    negative_score = sentiment_scores.get('negative', 0.0)
+
+    # 计算综合情感分数：positive - negative（范围 -1 到 1）
+    overall_score = positive_score - negative_score
+
+    return {
+        "sentiment": main_sentiment,           # 主要情感标签
+        "score": overall_score,               # 综合情感分数 (-1 到 1)
+        "scores": {                           # 所有情感分数
+            "positive": positive_score,
+            "neutral": neutral_score,
+            "negative": negative_score
+        },
+        "confidence": main_score,             # 主要情感的置信度
+        "label": main_sentiment              # 向后兼容
+    }
+
+
+def score_texts(texts):
+    """批量摘要 + 打分，返回 (逐条结果, 各阶段耗时)"""
+    all_scores, _, timings = sentiment_pipeline.run(texts)
+    logger.info(
+        f"批量情感分析完成: {timings['documents']} 条，缓存命中 {timings['cache_hits']} 条，"
+        f"计算 {timings['computed']} 条（超长 {timings['long']} 条，模式 {timings['mode']}），"
+        f"摘要 {timings['summarized']} 条（{timings['summary_batches']} 批，{timings['summarize']:.2f}s），"
+        f"片段 {timings['segments']} 个，"
+        f"打分 {timings['score_batches']} 批 {timings['score']:.2f}s，总计 {timings['total']:.2f}s")
+    return [format_scores(scores) for scores in all_scores], timings
+
+
+def aggregate_scores(results):
+    """整批文本的平均情感分数和各情感标签的数量"""
+    if not results:
+        return {"count": 0, "score": 0.0, "sentiment": None, "scores": {}, "labels": {}}
+    labels = {}
+    for result in results:
+        labels[result['sentiment']] = labels.get(result['sentiment'], 0) + 1
+    mean_scores = {
+        label: sum(result['scores'][label] for result in results) / len(results)
+        for label in ('positive', 'neutral', 'negative')
+    }
+    return {
+        "count": len(results),
+        "score": sum(result['score'] for result in results) / len(results),
+        "sentiment": max(mean_scores, key=mean_scores.get),
+        "scores": mean_scores,
+        "labels": labels,
+    }
+
 
 @app.route('/score', methods=['POST'])
 def score_text():
-    if Scorer is None or Summarizer is None:
-        logger.error("AI模型未加载，无法处理请求")
-        return jsonify({"error": "AI models not loaded. Please check server logs for details."}), 500
+    not_ready = ensure_models()
+    if not_ready is not None:
+        return not_ready
 
     try:
         data = request.get_json()
@@ -42,77 +230,95 @@ def score_text():
 
         logger.info(f"收到情感分析请求，文本长度: {len(text)}")
 
-        # Summarize if text is too long
-        summary = text
-        if len(text) > 512: # Max input length for FinBERT is typically 512 tokens
-            logger.info("文本过长，开始摘要处理...")
-            # Adjust max_length and min_length for summarizer based on typical news article length
-            # and desired summary length. Max_length for BART-large-cnn is 1024 tokens.
-            # We want a summary that FinBERT can handle, so aiming for < 512 tokens.
-            summary_output = Summarizer(text, max_length=200, min_length=50, do_sample=False)
-            summary = summary_output[0]['summary_text']
-            logger.info(f"摘要完成 - 原长度: {len(text)}, 摘要长度: {len(summary)}")
-
-        # Score the summary
-        logger.info("开始情感分析...")
-        ret = Scorer(summary, return_all_scores=True)  # 返回所有分数
-        logger.info(f"情感分析结果: {ret}")
-
-        # FinBERT returns all 3 sentiment scores when return_all_scores=True
-        # Format: [[{'label': 'positive', 'score': 0.898}, {'label': 'neutral', 'score': 0.067}, {'label': 'negative', 'score': 0.034}]]
-        
-        # 获取第一个（也是唯一的）结果
-        all_scores = ret[0] if isinstance(ret[0], list) else ret
-        
-        # 解析所有情感分数
-        sentiment_scores = {}
-        main_sentiment = None
-        main_score = 0
-        
-        # 提取所有情感分数并找到最高分
-        for result in all_scores:
-            label = result['label'].lower()
-            score = result['score']
-            sentiment_scores[label] = score
-            
-            if score > main_score:
-                main_score = score
-                main_sentiment = result['label']
-        
-        # 确保所有三个类别都存在
-        positive_score = sentiment_scores.get('positive', 0.0)
-        neutral_score = sentiment_scores.get('neutral', 0.0)
-        negative_score = sentiment_scores.get('negative', 0.0)
-        
-        # 计算综合情感分数：positive - negative（范围 -1 到 1）
-        overall_score = positive_score - negative_score
+        # 超长文本按 SENTIMENT_MODE 切窗口或摘要，与批量接口走同一条流水线
+        results, _ = score_texts([text])
+        logger.info(f"情感分析结果: {results[0]}")
+        return jsonify(results[0])
+    except Exception as e:
+        logger.error(f"处理文本时出错: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/score_batch', methods=['POST'])
+def score_batch():
+    """批量情感分析：{"texts": [...]}，返回逐条结果（与 /score 格式相同）和整体情感"""
+    not_ready = ensure_models()
+    if not_ready is not None:
+        return not_ready
+
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        texts = data.get('texts')
+        if not isinstance(texts, list) or not texts:
+            return jsonify({"error": "No texts provided"}), 400
+        if len(texts) > MAX_BATCH_TEXTS:
+            return jsonify({"error": f"Too many texts: {len(texts)} > {MAX_BATCH_TEXTS}"}), 400
+
+        # 空文本或非字符串不参与打分，在对应位置返回错误
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        logger.info(f"收到批量情感分析请求: {len(texts)} 条，有效 {len(valid)} 条")
+
+        results = [{"error": "No text provided"} for _ in texts]
+        scored, timings = score_texts([texts[i] for i in valid])
+        for i, result in zip(valid, scored):
+            results[i] = result
 
         return jsonify({
-            "sentiment": main_sentiment,           # 主要情感标签
-            "score": overall_score,               # 综合情感分数 (-1 到 1)
-            "scores": {                           # 所有情感分数
-                "positive": positive_score,
-                "neutral": neutral_score,
-                "negative": negative_score
-            },
-            "confidence": main_score,             # 主要情感的置信度
-            "label": main_sentiment              # 向后兼容
+            "results": results,
+            "aggregate": aggregate_scores(scored),
+            "timings": timings,
         })
     except Exception as e:
-        logger.error(f"处理文本时出错: {e}")
+        logger.error(f"批量处理文本时出错: {e}")
         return jsonify({"error": str(e)}), 500
 
+def readiness():
+    ready = model_state['status'] == 'ready'
+    return {
+        "ready": ready,
+        "model_status": model_state['status'],
+        "runtime": SENTIMENT_RUNTIME,
+        "mode": SENTIMENT_MODE,
+        "models": {"finbert": Scorer is not None, "bart": Summarizer is not None},
+        "error": model_state['error'],
+        "startup_timings": {name: round(seconds, 3) for name, seconds in model_state['timings'].items()},
+    }
+
+@app.route('/health/live', methods=['GET'])
+def liveness():
+    """存活检查：进程能处理 HTTP 请求即返回 200，不等待模型加载"""
+    return jsonify({"status": "alive", "uptime": round(time.perf_counter() - STARTED_AT, 1)})
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """就绪检查：模型加载完成返回 200，加载中或失败返回 503"""
+    info = readiness()
+    return jsonify(info), 200 if info['ready'] else 503
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    models_loaded = Scorer is not None and Summarizer is not None
-    status = "healthy" if models_loaded else "unhealthy"
+    info = readiness()
+    models_loaded = info['ready']
+    status = "healthy" if models_loaded else ("loading" if info['model_status'] in ('loading', 'not_started') else "unhealthy")
     logger.info(f"健康检查 - 状态: {status}, 模型已加载: {models_loaded}")
     return jsonify({
         "status": status, 
         "models_loaded": models_loaded,
-        "message": "情感分析服务运行正常" if models_loaded else "AI模型未加载"
+        **info,
+        "message": "情感分析服务运行正常" if models_loaded else ("AI模型加载中" if status == "loading" else "AI模型未加载"),
+        "sentiment_cache": sentiment_cache.stats(),
     }), 200 if models_loaded else 503
 
+@app.route('/cache', methods=['GET', 'DELETE'])
+def cache_info():
+    """GET 查看情感分析缓存统计，DELETE 清空缓存"""
+    if request.method == 'DELETE':
+        sentiment_cache.clear()
+        logger.info("情感分析缓存已清空")
+    return jsonify(sentiment_cache.stats())
+
 @app.route('/', methods=['GET'])
 def root():
     return jsonify({
@@ -120,11 +326,17 @@ def root():
         "version": "1.0.0",
         "endpoints": [
             {"path": "/score", "method": "POST", "description": "文本情感分析"},
-            {"path": "/health", "method": "GET", "description": "健康检查"}
+            {"path": "/score_batch", "method": "POST", "description": "批量文本情感分析"},
+            {"path": "/health", "method": "GET", "description": "健康检查"},
+            {"path": "/health/live", "method": "GET", "description": "存活检查（不等待模型加载）"},
+            {"path": "/health/ready", "method": "GET", "description": "就绪检查（模型加载完成）"},
+            {"path": "/cache", "method": "GET/DELETE", "description": "情感分析缓存统计/清空"}
         ]
     })
 
 if __name__ == '__main__':
     logger.info("启动情感分析服务...")
+    if SENTIMENT_PRELOAD:
+        start_loading()
     # Use 0.0.0.0 to make it accessible from outside the container/localhost
     app.run(host='0.0.0.0', port=5000, debug=False) # Set debug=False for production
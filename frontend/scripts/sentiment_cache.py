@@ -0,0 +1,142 @@
+"""
+按内容寻址的情感分析结果缓存
+以规范化文本的哈希为键，保存摘要、FinBERT 三个类别分数和模型版本；
+内存中一层 LRU，磁盘上一层 SQLite，服务重启后仍然有效，
+不同新闻源、不同日期重复出现的同一标题/正文只计算一次
+
+模型版本不同的结果互不命中，更换模型或摘要参数后旧结果自动失效
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+LABELS = ('positive', 'neutral', 'negative')
+# SQLite 单条语句的参数个数有上限，批量查询分段进行
+QUERY_CHUNK_SIZE = 500
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """规范化文本：Unicode 兼容形式、统一空白、去掉首尾空白、转小写（FinBERT 不区分大小写）"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip().lower()
+
+
+def text_key(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class SentimentCache:
+    def __init__(self, path=None, max_entries=10000):
+        """path 为 SQLite 文件路径，None 时只使用内存缓存"""
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS sentiment (
+                    key TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    positive REAL NOT NULL,
+                    neutral REAL NOT NULL,
+                    negative REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (key, model_version)
+                )""")
+            self._db.commit()
+
+    def _remember(self, memory_key, value):
+        self._entries[memory_key] = value
+        self._entries.move_to_end(memory_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, keys, model_version):
+        """批量查询，返回 {键: (摘要, 三类别分数 [{'label', 'score'}, ...])}，未命中的键不在结果中"""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            missing = []
+            for key in unique:
+                value = self._entries.get((model_version, key))
+                if value is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end((model_version, key))
+                    found[key] = value
+            self.hits += len(found)
+
+            if missing and self._db is not None:
+                for start in range(0, len(missing), QUERY_CHUNK_SIZE):
+                    chunk = missing[start:start + QUERY_CHUNK_SIZE]
+                    rows = self._db.execute(
+                        f"SELECT key, summary, positive, neutral, negative FROM sentiment "
+                        f"WHERE model_version = ? AND key IN ({','.join('?' * len(chunk))})",
+                        [model_version, *chunk]).fetchall()
+                    for key, summary, *scores in rows:
+                        value = (summary, [{'label': label, 'score': score} for label, score in zip(LABELS, scores)])
+                        self._remember((model_version, key), value)
+                        found[key] = value
+                        self.disk_hits += 1
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, items, model_version):
+        """批量写入 {键: (摘要, 三类别分数)}"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        with self._lock:
+            for key, (summary, all_scores) in items.items():
+                self._remember((model_version, key), (summary, all_scores))
+                scores = {result['label'].lower(): result['score'] for result in all_scores}
+                rows.append((key, model_version, summary, *(float(scores.get(label, 0.0)) for label in LABELS), now))
+            if self._db is not None:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO sentiment '
+                    '(key, model_version, summary, positive, neutral, negative, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+                self._db.commit()
+
+    def clear(self):
+        """清空内存和磁盘缓存"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM sentiment')
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            disk_entries = (self._db.execute('SELECT COUNT(*) FROM sentiment').fetchone()[0]
+                            if self._db is not None else None)
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk_entries': disk_entries,
+                'path': self.path,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,234 @@
+"""
+批量情感分析流水线
+先用 FinBERT 的分词器统计每条文本的 token 数，不超过模型上限（512 token）的文本直接打分；
+更长的文本有两种处理方式：
+- chunk（默认）：切成相互重叠的 token 窗口，所有窗口和短文本一起批量打分，
+  再按窗口 token 数加权平均得到整篇的分数，不调用 BART，全文都参与打分
+- summarize：先用 BART 批量摘要，再对摘要打分
+打分和摘要都按 token 长度排序后切成长度相近的桶，同一桶一起做前向计算，减少填充浪费，
+每个阶段记录耗时，吞吐量随批大小增长，而不是随文档数线性增加
+配置了结果缓存时，已经算过的文本（按规范化文本哈希）和同一批内的重复文本都只计算一次
+
+情感分析后端和 code/NewsSentimentAnalyzer.py 共用
+"""
+
+import time
+
+from sentiment_cache import text_key
+
+MODES = ('chunk', 'summarize')
+
+
+def length_buckets(lengths, batch_size, max_batch_tokens=None):
+    """按长度升序把下标切成批次
+
+    每批最多 batch_size 条；给定 max_batch_tokens 时，批内最长文本 × 条数不超过该值，
+    长文本的批自动变小，短文本的批保持满员
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    buckets = []
+    bucket = []
+    for i in order:
+        # 升序排列，加入 i 后批内最长的就是 lengths[i]
+        too_many_tokens = max_batch_tokens and bucket and lengths[i] * (len(bucket) + 1) > max_batch_tokens
+        if len(bucket) >= batch_size or too_many_tokens:
+            buckets.append(bucket)
+            bucket = []
+        bucket.append(i)
+    if bucket:
+        buckets.append(bucket)
+    return buckets
+
+
+def token_lengths(pipe, texts):
+    """用流水线自带的分词器统计 token 数（含特殊 token，不截断）"""
+    return [len(ids) for ids in pipe.tokenizer(list(texts), add_special_tokens=True)['input_ids']]
+
+
+def token_windows(tokenizer, text, window, stride):
+    """把长文本切成每段 window 个 token、相邻两段重叠 stride 个 token 的窗口
+
+    返回 [(窗口文本, token 数)]；快速分词器按字符偏移截取原文，否则把 token 解码回文本
+    """
+    step = window - stride
+    if getattr(tokenizer, 'is_fast', False):
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)['offset_mapping']
+        piece = lambda start, end: text[offsets[start][0]:offsets[end - 1][1]]
+        count = len(offsets)
+    else:
+        ids = tokenizer(text, add_special_tokens=False)['input_ids']
+        piece = lambda start, end: tokenizer.decode(ids[start:end])
+        count = len(ids)
+
+    windows = []
+    for start in range(0, count, step):
+        end = min(start + window, count)
+        windows.append((piece(start, end), end - start))
+        if end == count:
+            break
+    return windows
+
+
+def pool_scores(chunk_scores, weights):
+    """按权重（窗口 token 数）对各窗口的三类别分数加权平均"""
+    total = float(sum(weights))
+    pooled = {}
+    for all_scores, weight in zip(chunk_scores, weights):
+        for result in all_scores:
+            pooled[result['label']] = pooled.get(result['label'], 0.0) + result['score'] * weight / total
+    return [{'label': label, 'score': score} for label, score in pooled.items()]
+
+
+class SentimentPipeline:
+    def __init__(self, scorer, summarizer=None, mode='chunk', max_tokens=512, chunk_stride=64,
+                 summary_max_length=200, summary_min_length=50, batch_size=32, summary_batch_size=8,
+                 max_batch_tokens=16384, summary_max_batch_tokens=8192, cache=None):
+        """
+        scorer / summarizer：transformers 的 text-classification / summarization 流水线，
+        summarizer 只在 summarize 模式下使用
+        max_tokens：FinBERT 单次输入的 token 上限，超过的文本按 mode 切窗口或摘要
+        chunk_stride：相邻窗口重叠的 token 数
+        cache：SentimentCache，None 时不缓存
+        """
+        if mode not in MODES:
+            raise ValueError(f'Unknown sentiment mode: {mode} (expected one of {MODES})')
+        self.scorer = scorer
+        self.summarizer = summarizer
+        self.mode = mode
+        self.max_tokens = max_tokens
+        self.chunk_stride = chunk_stride
+        self.summary_max_length = summary_max_length
+        self.summary_min_length = summary_min_length
+        self.batch_size = batch_size
+        self.summary_batch_size = summary_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.summary_max_batch_tokens = summary_max_batch_tokens
+        self.cache = cache
+
+    @property
+    def version(self):
+        """模型和长文本处理参数的版本标识，作为缓存结果的模型版本"""
+        def model_name(pipe):
+            model = getattr(pipe, 'model', None)
+            return getattr(model, 'name_or_path', None) or type(pipe).__name__
+        if self.mode == 'summarize':
+            long_text = (f'summarize:{model_name(self.summarizer)}:'
+                         f'{self.summary_min_length}-{self.summary_max_length}')
+        else:
+            long_text = f'chunk:{self.chunk_stride}'
+        return f'{model_name(self.scorer)}|{self.max_tokens}|{long_text}'
+
+    def summarize(self, texts, timings):
+        """批量摘要，返回与 texts 等长的摘要列表"""
+        started = time.perf_counter()
+        summaries = [None] * len(texts)
+        lengths = token_lengths(self.summarizer, texts)
+        buckets = length_buckets(lengths, self.summary_batch_size, self.summary_max_batch_tokens)
+        timings['summary_batches'] = len(buckets)
+        for bucket in buckets:
+            outputs = self.summarizer([texts[i] for i in bucket], batch_size=len(bucket),
+                                      max_length=self.summary_max_length,
+                                      min_length=self.summary_min_length,
+                                      do_sample=False, truncation=True)
+            for i, output in zip(bucket, outputs):
+                summaries[i] = output['summary_text']
+        timings['summarized'] = len(texts)
+        timings['summarize'] = time.perf_counter() - started
+        return summaries
+
+    def score(self, texts, lengths, timings):
+        """按已知 token 数分桶批量打分，返回每条文本的三类别分数 [{'label', 'score'}, ...]"""
+        started = time.perf_counter()
+        buckets = length_buckets(lengths, self.batch_size, self.max_batch_tokens)
+        timings['score_batches'] = len(buckets)
+        results = [None] * len(texts)
+        for bucket in buckets:
+            outputs = self.scorer([texts[i] for i in bucket], batch_size=len(bucket),
+                                  return_all_scores=True, truncation=True)
+            for i, output in zip(bucket, outputs):
+                results[i] = output
+        timings['score'] = time.perf_counter() - started
+        return results
+
+    def _compute(self, texts, timings):
+        """返回 (每条文本的三类别分数, 实际打分的文本)"""
+        started = time.perf_counter()
+        lengths = token_lengths(self.scorer, texts)
+        long_indices = [i for i, length in enumerate(lengths) if length > self.max_tokens]
+        timings['long'] = len(long_indices)
+        timings['tokenize'] = time.perf_counter() - started
+
+        scored_texts = list(texts)
+        if self.mode == 'summarize' and long_indices:
+            summaries = self.summarize([texts[i] for i in long_indices], timings)
+            for i, summary in zip(long_indices, summaries):
+                scored_texts[i] = summary
+            summary_lengths = token_lengths(self.scorer, summaries)
+            for i, length in zip(long_indices, summary_lengths):
+                lengths[i] = length
+            timings['segments'] = len(texts)
+            return self.score(scored_texts, lengths, timings), scored_texts
+
+        # 所有文本切成不超过 max_tokens 的片段，短文本就是一个片段；片段一起分桶打分后按文档汇总
+        segments, segment_lengths, owners, weights = [], [], [], []
+        long_set = set(long_indices)
+        # 窗口本身不含 [CLS]/[SEP]，留出特殊 token 的位置
+        special_tokens = 2
+        for i, text in enumerate(texts):
+            if i in long_set:
+                windows = token_windows(self.scorer.tokenizer, text,
+                                        self.max_tokens - special_tokens, self.chunk_stride)
+            else:
+                windows = [(text, lengths[i] - special_tokens)]
+            for window_text, count in windows:
+                segments.append(window_text)
+                segment_lengths.append(count + special_tokens)
+                owners.append(i)
+                weights.append(max(count, 1))
+        timings['segments'] = len(segments)
+
+        segment_scores = self.score(segments, segment_lengths, timings)
+        per_text = [([], []) for _ in texts]
+        for owner, all_scores, weight in zip(owners, segment_scores, weights):
+            per_text[owner][0].append(all_scores)
+            per_text[owner][1].append(weight)
+        results = [scores[0] if len(scores) == 1 else pool_scores(scores, w) for scores, w in per_text]
+        return results, scored_texts
+
+    def run(self, texts):
+        """返回 (每条文本的三类别分数, 实际打分的文本（摘要模式下为摘要）, 各阶段耗时)"""
+        timings = {'documents': len(texts), 'mode': self.mode, 'cache_hits': 0, 'computed': 0,
+                   'long': 0, 'segments': 0, 'tokenize': 0.0, 'summarized': 0, 'summary_batches': 0,
+                   'summarize': 0.0, 'score_batches': 0, 'score': 0.0}
+        if not texts:
+            timings['total'] = 0.0
+            return [], [], timings
+        started = time.perf_counter()
+        if self.cache is None:
+            results, summaries = self._compute(texts, timings)
+            timings['computed'] = len(texts)
+            timings['total'] = time.perf_counter() - started
+            return results, summaries, timings
+
+        version = self.version
+        keys = [text_key(text) for text in texts]
+        known = self.cache.get_many(keys, version)
+        timings['cache_hits'] = sum(1 for key in keys if key in known)
+
+        # 未命中的文本按键去重，同一批内的重复文本只算一次
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in known:
+                pending.setdefault(key, text)
+        if pending:
+            results, summaries = self._compute(list(pending.values()), timings)
+            # 没有摘要的文本不重复保存原文
+            computed = {key: ('' if summary == text else summary, result)
+                        for (key, text), summary, result in zip(pending.items(), summaries, results)}
+            self.cache.put_many(computed, version)
+            known.update(computed)
+        timings['computed'] = len(pending)
+
+        timings['total'] = time.perf_counter() - started
+        return ([known[key][1] for key in keys],
+                [known[key][0] or text for key, text in zip(keys, texts)], timings)
@@ -0,0 +1,79 @@
+"""
+finbert_onnx 的单元测试：OnnxTextClassifier 返回格式与 text-classification 流水线一致
+不需要 onnxruntime 和导出的模型：分类器用桩分词器和桩推理会话构造
+运行: python -m pytest -q test_finbert_onnx.py
+"""
+
+import types
+
+import numpy as np
+import pytest
+
+from finbert_onnx import OnnxTextClassifier
+
+LABELS = ['positive', 'negative', 'neutral']
+
+
+class StubTokenizer:
+    def __call__(self, texts, padding=True, truncation=True, max_length=512, return_tensors='np'):
+        lengths = [len(text.split()) for text in texts]
+        width = max(lengths)
+        ids = np.array([[1] * n + [0] * (width - n) for n in lengths])
+        return {'input_ids': ids, 'attention_mask': (ids > 0).astype('int64')}
+
+
+class StubSession:
+    """logits 由词数决定：一个词偏 positive，两个词偏 negative，其余偏 neutral"""
+
+    def __init__(self):
+        self.batches = []
+
+    def run(self, output_names, feeds):
+        counts = feeds['attention_mask'].sum(axis=1)
+        self.batches.append(len(counts))
+        logits = np.zeros((len(counts), len(LABELS)), dtype='float32')
+        for row, count in enumerate(counts):
+            logits[row, min(count, 3) - 1] = 4.0
+        return [logits]
+
+
+@pytest.fixture
+def classifier():
+    instance = object.__new__(OnnxTextClassifier)
+    instance.tokenizer = StubTokenizer()
+    instance.session = StubSession()
+    instance.labels = LABELS
+    instance.input_names = ['input_ids', 'attention_mask']
+    instance.model = types.SimpleNamespace(name_or_path='stub@onnx')
+    return instance
+
+
+def test_single_text_returns_top_label_list(classifier):
+    result = classifier('gain')
+    assert len(result) == 1
+    assert result[0]['label'] == 'positive'
+    assert result[0]['score'] == pytest.approx(np.exp(4) / (np.exp(4) + 2))
+
+
+def test_single_text_all_scores_is_nested_once(classifier):
+    result = classifier('gain', return_all_scores=True)
+    assert len(result) == 1 and len(result[0]) == len(LABELS)
+    assert [r['label'] for r in result[0]] == LABELS
+    assert sum(r['score'] for r in result[0]) == pytest.approx(1.0)
+
+
+def test_list_input_returns_one_result_per_text(classifier):
+    texts = ['gain', 'sharp loss', 'rates held steady', 'up']
+    top = classifier(texts)
+    assert [r['label'] for r in top] == ['positive', 'negative', 'neutral', 'positive']
+
+    all_scores = classifier(texts, return_all_scores=True)
+    assert len(all_scores) == len(texts)
+    assert all(len(scores) == len(LABELS) for scores in all_scores)
+    assert [max(scores, key=lambda r: r['score'])['label'] for scores in all_scores] == \
+        [r['label'] for r in top]
+
+
+def test_list_input_is_split_into_batches(classifier):
+    classifier(['a', 'b c', 'd e f', 'g', 'h'], batch_size=2, return_all_scores=True)
+    assert classifier.session.batches == [2, 2, 1]
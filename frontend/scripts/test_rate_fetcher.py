@@ -0,0 +1,283 @@
+"""
+rate_fetcher 的单元测试：汇率源熔断状态转换、汇率表并发刷新合并、
+本地桩服务器上的汇率源竞争
+运行: python -m pytest -q test_rate_fetcher.py
+"""
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import rate_fetcher
+from rate_fetcher import ProviderHealth, RateFetcher, RateProvider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_fetcher.time, 'monotonic', fake)
+    return fake
+
+
+def test_consecutive_failures_open_breaker(clock):
+    health = ProviderHealth('stub', failure_threshold=3, cooldown=30)
+    for _ in range(2):
+        health.record(False, 0.1)
+    assert health.state == ProviderHealth.CLOSED
+    assert health.allow()
+
+    health.record(False, 0.1)
+    assert health.state == ProviderHealth.OPEN
+    assert not health.allow()
+    assert health.skipped == 1
+
+
+def test_error_rate_opens_breaker_without_consecutive_failures(clock):
+    health = ProviderHealth('stub', failure_threshold=100, error_rate_threshold=0.5, min_samples=4)
+    for ok in (True, False, True, False):
+        health.record(ok, 0.1)
+    assert health.state == ProviderHealth.CLOSED
+
+    health.record(False, 0.1)
+    assert health.state == ProviderHealth.OPEN
+
+
+def test_half_open_allows_single_trial_and_success_closes(clock):
+    health = ProviderHealth('stub', failure_threshold=1, cooldown=30)
+    health.record(False, 0.1)
+    assert health.state == ProviderHealth.OPEN
+
+    clock.now += 29
+    assert not health.allow()
+    clock.now += 1
+    assert health.allow()
+    assert health.state == ProviderHealth.HALF_OPEN
+    # 试探请求未结束前不再放行
+    assert not health.allow()
+
+    health.record(True, 0.2)
+    assert health.state == ProviderHealth.CLOSED
+    assert health.consecutive_failures == 0
+    assert health.allow()
+
+
+def test_half_open_failure_reopens(clock):
+    health = ProviderHealth('stub', failure_threshold=3, cooldown=30)
+    for _ in range(3):
+        health.record(False, 0.1)
+    clock.now += 30
+    assert health.allow()
+
+    health.record(False, 0.1)
+    assert health.state == ProviderHealth.OPEN
+    assert health.opened_at == clock.now
+    assert not health.allow()
+
+
+def test_cancelled_trial_releases_half_open_slot(clock):
+    health = ProviderHealth('stub', failure_threshold=1, cooldown=30)
+    health.record(False, 0.1)
+    clock.now += 30
+    assert health.allow()
+
+    health.release(elapsed=0.5)
+    assert health.state == ProviderHealth.HALF_OPEN
+    assert health.allow()
+    # 被取消请求的等待时间计入耗时，不计入成败
+    assert health.latency(50) == pytest.approx(0.5)
+    assert health.error_rate() == 1.0
+
+
+def stub_fetcher(delay=0.05):
+    """汇率源请求被替换为计数的桩函数，不访问网络"""
+    fetcher = RateFetcher(providers=[RateProvider('stub', 'http://stub/{base}')], ttl=60)
+    calls = []
+
+    async def from_provider(provider, base):
+        calls.append(base)
+        await asyncio.sleep(delay)
+        return provider.name, {'CNY': 7.2, 'EUR': 0.92}
+
+    fetcher._from_provider = from_provider
+    return fetcher, calls
+
+
+def test_concurrent_snapshot_misses_share_one_upstream_fetch():
+    fetcher, calls = stub_fetcher()
+
+    async def main():
+        return await asyncio.gather(*(fetcher.snapshot('USD') for _ in range(20)))
+
+    snapshots = asyncio.run(main())
+    assert calls == ['USD']
+    assert fetcher.upstream_calls == 1
+    assert fetcher.misses == 20
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert snapshots[0].cross('USD', 'CNY') == pytest.approx(7.2)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_refresh():
+    fetcher, calls = stub_fetcher()
+
+    async def main():
+        first = asyncio.ensure_future(fetcher.snapshot('USD'))
+        second = asyncio.ensure_future(fetcher.snapshot('USD'))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first
+
+    snapshot, first = asyncio.run(main())
+    assert first.cancelled()
+    assert snapshot is not None and snapshot.source == 'stub'
+    assert calls == ['USD']
+
+
+def test_fresh_snapshot_is_served_from_cache():
+    fetcher, calls = stub_fetcher(delay=0)
+
+    async def main():
+        await fetcher.snapshot('USD')
+        await fetcher.snapshot('USD')
+        await fetcher.snapshot('USD', force=True)
+
+    asyncio.run(main())
+    assert calls == ['USD', 'USD']
+    assert fetcher.hits == 1
+
+
+def test_fetch_deadline_covers_pivot_and_base_lookups():
+    # 每次汇率表刷新耗时超过总超时的一半：中转货币表缺少目标货币时还要请求 base 的表
+    fetcher = RateFetcher(providers=[RateProvider('stub', 'http://stub/{base}')], timeout=0.2)
+    calls = []
+
+    async def from_provider(provider, base):
+        calls.append(base)
+        await asyncio.sleep(0.7)
+        if base == 'USD':
+            return provider.name, {'EUR': 0.92}
+        return provider.name, {'XAU': 0.0005}
+
+    fetcher._from_provider = from_provider
+    try:
+        assert fetcher.fetch('CNY', 'XAU') == ('stub', pytest.approx(0.0005))
+    finally:
+        fetcher.close()
+    assert calls == ['USD', 'CNY']
+
+
+SLOW_DELAY = 2.0
+
+
+async def start_stub_server(hits):
+    """慢、失败、正常三个桩汇率源，hits 记录各路径收到的请求数"""
+    async def slow(request):
+        hits['slow'] += 1
+        await asyncio.sleep(SLOW_DELAY)
+        return web.json_response({'rates': {'CNY': 1.0}})
+
+    async def failing(request):
+        hits['failing'] += 1
+        return web.Response(status=500)
+
+    async def good(request):
+        hits['good'] += 1
+        return web.json_response({'rates': {'CNY': 7.2, 'EUR': 0.92}})
+
+    app = web.Application()
+    app.router.add_get('/slow/{base}', slow)
+    app.router.add_get('/failing/{base}', failing)
+    app.router.add_get('/good/{base}', good)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def race_fetcher(server, names, **kwargs):
+    root = str(server.make_url('/'))
+    providers = [RateProvider(name, root + name + '/{base}') for name in names]
+    fetcher = RateFetcher(providers=providers, hedge_delay=0.05, **kwargs)
+    fetcher._session = aiohttp.ClientSession()
+    return fetcher
+
+
+def run_race(names, rounds=1, **kwargs):
+    """在桩服务器上按 names 顺序的汇率源竞争 rounds 次，返回 (各次结果, 耗时, 请求数, fetcher)"""
+    hits = dict.fromkeys(['slow', 'failing', 'good'], 0)
+
+    async def main():
+        server = await start_stub_server(hits)
+        fetcher = race_fetcher(server, names, **kwargs)
+        try:
+            started = time.monotonic()
+            results = [await fetcher.race('USD') for _ in range(rounds)]
+            return results, time.monotonic() - started, fetcher
+        finally:
+            await fetcher._session.close()
+            await server.close()
+
+    results, elapsed, fetcher = asyncio.run(main())
+    return results, elapsed, hits, fetcher
+
+
+def test_race_returns_fastest_valid_answer_and_cancels_losers():
+    results, elapsed, hits, fetcher = run_race(['slow', 'failing', 'good'])
+
+    source, rates = results[0]
+    assert source == 'good'
+    assert rates['CNY'] == pytest.approx(7.2)
+    # 慢汇率源被对冲请求超过后取消，不等到它返回
+    assert elapsed < SLOW_DELAY / 2
+    assert hits == {'slow': 1, 'failing': 1, 'good': 1}
+    assert fetcher.health['slow'].cancelled == 1
+    assert fetcher.health['slow'].requests == 0
+    assert fetcher.health['failing'].consecutive_failures == 1
+    assert fetcher.health['good'].requests == 1
+
+
+def test_failed_provider_is_moved_behind_healthy_ones():
+    results, _, hits, fetcher = run_race(['failing', 'good'], rounds=5)
+
+    assert all(result[0] == 'good' for result in results)
+    # 第一次失败后错误率超过阈值，之后先请求正常的汇率源，它及时返回就不再请求失败的
+    assert hits == {'slow': 0, 'failing': 1, 'good': 5}
+    assert fetcher.health['failing'].consecutive_failures == 1
+
+
+def test_open_breaker_provider_is_not_requested():
+    hits = dict.fromkeys(['slow', 'failing', 'good'], 0)
+
+    async def main():
+        server = await start_stub_server(hits)
+        fetcher = race_fetcher(server, ['failing', 'good'], cooldown=60)
+        health = fetcher.health['failing']
+        for _ in range(health.failure_threshold):
+            health.record(False, 0.01)
+        try:
+            return await fetcher.race('USD'), fetcher
+        finally:
+            await fetcher._session.close()
+            await server.close()
+
+    result, fetcher = asyncio.run(main())
+    assert result[0] == 'good'
+    assert hits['failing'] == 0
+    assert fetcher.health['failing'].state == ProviderHealth.OPEN
+    assert fetcher.health['failing'].skipped == 1
+
+
+def test_race_returns_none_when_every_provider_fails():
+    results, _, hits, fetcher = run_race(['failing'])
+    assert results == [None]
+    assert hits['failing'] == 1
@@ -0,0 +1,63 @@
+"""
+sentiment_cache 的单元测试：文本规范化、命中/未命中、SQLite 持久化
+运行: python -m pytest -q test_sentiment_cache.py
+"""
+
+import pytest
+
+from sentiment_cache import SentimentCache, normalize_text, text_key
+
+SCORES = [{'label': 'positive', 'score': 0.7},
+          {'label': 'neutral', 'score': 0.2},
+          {'label': 'negative', 'score': 0.1}]
+
+
+def test_normalize_text_collapses_whitespace_case_and_width():
+    assert normalize_text('  Stocks\tRALLIED\n\ntoday  ') == 'stocks rallied today'
+    # 全角字符按 NFKC 转为半角
+    assert normalize_text('ＵＳＤ　１００') == 'usd 100'
+
+
+def test_text_key_ignores_formatting_differences():
+    assert text_key('Fed holds rates') == text_key('  fed   HOLDS\nrates ')
+    assert text_key('Fed holds rates') != text_key('Fed cuts rates')
+
+
+def test_memory_hit_and_miss():
+    cache = SentimentCache(max_entries=10)
+    key = text_key('Fed holds rates')
+    assert cache.get_many([key], 'v1') == {}
+
+    cache.put_many({key: ('', SCORES)}, 'v1')
+    assert cache.get_many([key, key], 'v1') == {key: ('', SCORES)}
+    # 模型版本不同的结果互不命中
+    assert cache.get_many([key], 'v2') == {}
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['disk_entries']) == (1, 2, None)
+
+
+def test_lru_eviction():
+    cache = SentimentCache(max_entries=2)
+    cache.put_many({'a': ('', SCORES), 'b': ('', SCORES)}, 'v1')
+    cache.get_many(['a'], 'v1')
+    cache.put_many({'c': ('', SCORES)}, 'v1')
+    assert set(cache.get_many(['a', 'b', 'c'], 'v1')) == {'a', 'c'}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_results_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'cache' / 'sentiment.sqlite3')
+    key = text_key('Fed holds rates')
+    SentimentCache(path).put_many({key: ('summary text', SCORES)}, 'v1')
+
+    reopened = SentimentCache(path)
+    summary, scores = reopened.get_many([key], 'v1')[key]
+    assert summary == 'summary text'
+    assert {r['label']: r['score'] for r in scores} == pytest.approx(
+        {r['label']: r['score'] for r in SCORES})
+    assert reopened.stats()['disk_hits'] == 1
+    assert reopened.get_many([key], 'v2') == {}
+
+    reopened.clear()
+    assert SentimentCache(path).get_many([key], 'v1') == {}
@@ -0,0 +1,78 @@
+"""
+sentiment_pipeline 的单元测试：长文本窗口分数按 token 数加权汇总
+运行: python -m pytest -q test_sentiment_pipeline.py
+"""
+
+import pytest
+
+from sentiment_pipeline import SentimentPipeline, pool_scores
+
+
+def scores(positive, neutral, negative):
+    return [{'label': 'positive', 'score': positive},
+            {'label': 'neutral', 'score': neutral},
+            {'label': 'negative', 'score': negative}]
+
+
+def as_dict(all_scores):
+    return {result['label']: result['score'] for result in all_scores}
+
+
+def test_pool_scores_weights_by_token_count():
+    pooled = as_dict(pool_scores([scores(0.9, 0.1, 0.0), scores(0.0, 0.1, 0.9)], [300, 100]))
+    assert pooled == pytest.approx({'positive': 0.675, 'neutral': 0.1, 'negative': 0.225})
+    assert sum(pooled.values()) == pytest.approx(1.0)
+
+
+def test_pool_scores_equal_weights_is_mean():
+    pooled = as_dict(pool_scores([scores(0.6, 0.3, 0.1), scores(0.2, 0.3, 0.5)], [1, 1]))
+    assert pooled == pytest.approx({'positive': 0.4, 'neutral': 0.3, 'negative': 0.3})
+
+
+def test_pool_scores_single_window_is_unchanged():
+    window = scores(0.5, 0.3, 0.2)
+    assert as_dict(pool_scores([window], [42])) == pytest.approx(as_dict(window))
+
+
+class WordTokenizer:
+    """按空白切词的分词器，每个词一个 token，另加 [CLS]/[SEP]"""
+    is_fast = False
+
+    def __call__(self, texts, add_special_tokens=True, **kwargs):
+        def encode(text):
+            ids = text.split()
+            return ['[CLS]', *ids, '[SEP]'] if add_special_tokens else ids
+        if isinstance(texts, str):
+            return {'input_ids': encode(texts)}
+        return {'input_ids': [encode(text) for text in texts]}
+
+    def decode(self, ids):
+        return ' '.join(ids)
+
+
+class WordScorer:
+    """positive 分数为 'up' 词所占比例的桩打分器"""
+
+    def __init__(self):
+        self.tokenizer = WordTokenizer()
+
+    def __call__(self, texts, batch_size=32, return_all_scores=True, truncation=True):
+        results = []
+        for text in texts:
+            words = text.split()
+            up = words.count('up') / len(words)
+            results.append(scores(up, 0.0, 1.0 - up))
+        return results
+
+
+def test_long_text_is_chunked_and_pooled_by_tokens():
+    scorer = WordScorer()
+    pipeline = SentimentPipeline(scorer, max_tokens=10, chunk_stride=0)
+    # 8 个 up 加 4 个 down：按 8 token 的窗口切成 [8 up] 和 [4 down]
+    long_text = ' '.join(['up'] * 8 + ['down'] * 4)
+    results, _, timings = pipeline.run([long_text, 'up down'])
+
+    assert timings['long'] == 1
+    assert timings['segments'] == 3
+    assert as_dict(results[0])['positive'] == pytest.approx(8 / 12)
+    assert as_dict(results[1])['positive'] == pytest.approx(0.5)
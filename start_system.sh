@@ -23,25 +23,36 @@ python3 sentiment-analysis-backend.py &
 SENTIMENT_PID=$!
 echo "情感分析服务PID: $SENTIMENT_PID"
 
-# 等待后端服务启动
+# 启动常驻汇率预测服务（TensorFlow只在进程启动时导入一次）
+echo "📈 启动汇率预测服务..."
+cd "/home/ubuntu/-/结合新闻情感预测"
+python3 prediction_server.py &
+PREDICTION_PID=$!
+echo "汇率预测服务PID: $PREDICTION_PID"
+
+# 等待情感分析服务启动：HTTP 服务先起来（存活），模型在后台加载完成后才就绪
 echo "⏳ 等待后端服务启动..."
-sleep 10
+for i in {1..30}; do
+    curl -s http://localhost:5000/health/live >/dev/null 2>&1 && break
+    sleep 1
+done
 
-# 检查后端服务是否正常 (重试机制)
 BACKEND_READY=false
-for i in {1..6}; do
-    if curl -s http://localhost:5000/health >/dev/null 2>&1; then
-        echo "✅ 情感分析后端服务启动成功"
+for i in {1..180}; do
+    if curl -s -f http://localhost:5000/health/ready >/dev/null 2>&1; then
+        echo "✅ 情感分析后端服务启动成功（${i}s）"
+        curl -s http://localhost:5000/health/ready | python3 -c "import sys, json; print('   启动耗时:', json.load(sys.stdin).get('startup_timings'))" 2>/dev/null
         BACKEND_READY=true
         break
-    else
-        echo "⏳ 等待后端服务响应... ($i/6)"
-        sleep 5
     fi
-    if [ $i -eq 6 ]; then
-        echo "❌ 情感分析后端服务启动超时，但服务可能仍在初始化中"
+    if [ $((i % 10)) -eq 0 ]; then
+        echo "⏳ 等待模型加载... (${i}s)"
     fi
+    sleep 1
 done
+if [ "$BACKEND_READY" = false ]; then
+    echo "❌ 情感分析后端服务启动超时，但服务可能仍在初始化中"
+fi
 
 # 测试API端点
 if [ "$BACKEND_READY" = true ]; then
@@ -72,7 +83,7 @@ echo "   访问地址: http://119.28.27.178:3000"
 echo "   确保云服务器安全组已开放 3000 和 5000 端口"
 echo ""
 echo "🛑 停止服务命令："
-echo "   kill $SENTIMENT_PID $FRONTEND_PID"
+echo "   kill $SENTIMENT_PID $PREDICTION_PID $FRONTEND_PID"
 echo ""
 echo "💡 使用说明："
 echo "   1. 打开浏览器访问 http://119.28.27.178:3000"
@@ -87,10 +98,10 @@ echo "   3. 建议仅对可信IP开放访问权限"
 echo ""
 
 # 保存PID到文件以便后续停止
-echo "$SENTIMENT_PID $FRONTEND_PID" > /tmp/exchange_system_pids.txt
+echo "$SENTIMENT_PID $PREDICTION_PID $FRONTEND_PID" > /tmp/exchange_system_pids.txt
 
 # 等待用户输入来停止服务
 echo "按 Ctrl+C 停止所有服务..."
-trap 'echo "🛑 正在停止服务..."; kill $SENTIMENT_PID $FRONTEND_PID 2>/dev/null; rm -f /tmp/exchange_system_pids.txt; echo "✅ 所有服务已停止"; exit 0' INT
+trap 'echo "🛑 正在停止服务..."; kill $SENTIMENT_PID $PREDICTION_PID $FRONTEND_PID 2>/dev/null; rm -f /tmp/exchange_system_pids.txt; echo "✅ 所有服务已停止"; exit 0' INT
 
 wait
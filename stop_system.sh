@@ -15,8 +15,10 @@ fi
 # 强制停止所有相关进程
 echo "清理所有相关进程..."
 pkill -f sentiment-analysis-backend 2>/dev/null || true
+pkill -f prediction_server.py 2>/dev/null || true
 pkill -f "next" 2>/dev/null || true
 lsof -ti:3000 | xargs kill -9 2>/dev/null || true
 lsof -ti:5000 | xargs kill -9 2>/dev/null || true
+lsof -ti:5003 | xargs kill -9 2>/dev/null || true
 
 echo "✅ 系统已完全停止"
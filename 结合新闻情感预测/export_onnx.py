@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+模型导出工具
+将注册表中的Keras Transformer-LSTM模型（含位置编码Lambda层）转换为ONNX格式，
+供 predict_api_onnx.py 在不导入TensorFlow的情况下推理
+
+用法:
+    python3 export_onnx.py            # 导出所有尚未导出的条目
+    python3 export_onnx.py --force    # 重新导出全部条目
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from model_registry import get_registry, ONNX_FILENAME
+
+
+def export_entry(registry, currency, bank, look_back, fingerprint, opset=13):
+    """导出单个注册表条目为ONNX，返回导出文件路径"""
+    import tensorflow as tf
+    import tf2onnx
+    # 导入预测模块以注册 add_positional_encoding 等自定义对象
+    import predict_api_multimodal_transformer  # noqa: F401
+
+    keras_model, _, _ = registry.load(currency, bank, look_back, fingerprint, cached=False)
+    input_signature = [
+        tf.TensorSpec((None, look_back, 1), tf.float32, name='price_input'),
+        tf.TensorSpec((None, look_back, 1), tf.float32, name='sentiment_input'),
+    ]
+    model_proto, _ = tf2onnx.convert.from_keras(keras_model, input_signature=input_signature, opset=opset)
+
+    entry = registry.entry_dir(currency, bank, look_back, fingerprint)
+    onnx_path = os.path.join(entry, ONNX_FILENAME)
+    tmp_path = onnx_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(model_proto.SerializeToString())
+    os.replace(tmp_path, onnx_path)
+    print(f"Exported ONNX model: {onnx_path}", file=sys.stderr)
+    return onnx_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导出Transformer-LSTM模型为ONNX格式')
+    parser.add_argument('--currencies', nargs='*', help='只导出指定货币')
+    parser.add_argument('--opset', type=int, default=13)
+    parser.add_argument('--force', action='store_true', help='已导出的条目也重新导出')
+    args = parser.parse_args()
+
+    registry = get_registry()
+    exported, skipped, failed = [], [], []
+    for currency, bank, look_back, fingerprint in registry.entries():
+        if args.currencies and currency not in args.currencies:
+            continue
+        entry = registry.entry_dir(currency, bank, look_back, fingerprint)
+        if not args.force and os.path.exists(os.path.join(entry, ONNX_FILENAME)):
+            skipped.append(entry)
+            continue
+        try:
+            exported.append(export_entry(registry, currency, bank, look_back, fingerprint, args.opset))
+        except Exception as e:
+            print(f"Failed to export {entry}: {e}", file=sys.stderr)
+            failed.append(entry)
+
+    print(json.dumps({
+        'exported': len(exported),
+        'skipped': len(skipped),
+        'failed': failed,
+    }, ensure_ascii=False, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
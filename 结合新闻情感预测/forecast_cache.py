@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+预测结果缓存
+以请求参数、数据文件版本（修改时间+大小）和模型标识为键，带TTL过期和LRU淘汰，
+数据文件更新或模型重新训练后旧结果自动失效；同一键的并发请求只计算一次
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import date
+
+# 降级预测的结果是随机生成的，不缓存
+UNCACHEABLE_MODEL_TYPES = {'Fallback Statistical Model', 'API-based Prediction'}
+
+
+def data_version(*paths):
+    """数据文件版本：任一文件修改时间或大小变化即版本变化"""
+    version = []
+    for path in paths:
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            version.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+        else:
+            version.append((path, None, None))
+    return tuple(version)
+
+
+class ForecastCache:
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 正在计算的键 -> [计算锁, 等待/计算中的线程数]
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def make_key(self, model_type, currency_pair, days, dataset_path, version, model=None):
+        """构造缓存键；预测日期基于当天，因此键中包含日期
+
+        model 为所用模型的标识（注册表条目版本、ONNX 文件版本等），模型更新后不再命中旧结果
+        """
+        dataset = os.path.abspath(dataset_path) if dataset_path else ''
+        return (model_type, currency_pair, int(days), dataset, version, model, date.today().isoformat())
+
+    def _lookup(self, key):
+        """返回未过期的缓存值，不计入命中统计；调用方需持有 self._lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.time() - stored_at > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key):
+        """读取缓存，未命中或已过期返回 None"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """写入缓存，超过容量时淘汰最久未使用的条目"""
+        if not value.get('success') or value.get('model_type') in UNCACHEABLE_MODEL_TYPES:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """命中直接返回，否则计算并缓存
+
+        同一键同时未命中的请求只有一个执行 compute，其余等待并直接使用它缓存的结果
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            inflight = self._inflight.setdefault(key, [threading.Lock(), 0])
+            inflight[1] += 1
+        try:
+            with inflight[0]:
+                with self._lock:
+                    value = self._lookup(key)
+                if value is not None:
+                    with self._lock:
+                        self.coalesced += 1
+                    return value
+                value = compute()
+                self.put(key, value)
+                return value
+        finally:
+            with self._lock:
+                inflight[1] -= 1
+                if inflight[1] == 0:
+                    del self._inflight[key]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'coalesced': self.coalesced,
+                'computing': len(self._inflight),
+            }
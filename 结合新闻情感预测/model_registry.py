@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+训练模型注册表
+按 (货币, 银行数据集, look_back, 数据文件指纹) 持久化训练好的Keras模型及其缩放器，
+数据文件未变化时直接加载，避免每次请求重新训练
+"""
+
+import sys
+import os
+import json
+import copy
+import hashlib
+import threading
+from datetime import datetime
+
+import joblib
+
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_registry')
+
+MODEL_FILENAME = 'model.keras'
+SCALERS_FILENAME = 'scalers.save'
+META_FILENAME = 'meta.json'
+ONNX_FILENAME = 'model.onnx'
+
+
+def file_fingerprint(*paths):
+    """计算数据文件内容指纹（任一文件内容变化即指纹变化）"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def dataset_name(dataset_path):
+    """由数据集路径得到银行数据集名称"""
+    if not dataset_path:
+        return 'default'
+    name = os.path.basename(os.path.normpath(dataset_path))
+    return name.replace(' ', '_') or 'default'
+
+
+class ModelRegistry:
+    def __init__(self, root=None, keep_in_memory=False):
+        self.root = root or os.environ.get('MODEL_REGISTRY_DIR', DEFAULT_REGISTRY_DIR)
+        # 常驻进程中保留已加载的模型，避免重复反序列化
+        self.keep_in_memory = keep_in_memory
+        self._loaded = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def entry_lock(self, currency, bank, look_back, fingerprint):
+        """获取条目锁，防止并发请求重复训练同一模型"""
+        entry = self.entry_dir(currency, bank, look_back, fingerprint)
+        with self._locks_guard:
+            if entry not in self._locks:
+                self._locks[entry] = threading.Lock()
+            return self._locks[entry]
+
+    def loaded_entries(self):
+        """已常驻内存的条目目录列表"""
+        return list(self._loaded.keys())
+
+    def entry_dir(self, currency, bank, look_back, fingerprint):
+        """注册表条目目录"""
+        return os.path.join(self.root, currency, bank, f'lb{look_back}', fingerprint)
+
+    def exists(self, currency, bank, look_back, fingerprint):
+        """是否已有对应条目"""
+        entry = self.entry_dir(currency, bank, look_back, fingerprint)
+        return all(os.path.exists(os.path.join(entry, name))
+                   for name in (MODEL_FILENAME, SCALERS_FILENAME, META_FILENAME))
+
+    def save(self, currency, bank, look_back, fingerprint, keras_model, scalers, meta=None):
+        """保存模型、缩放器和元数据"""
+        entry = self.entry_dir(currency, bank, look_back, fingerprint)
+        os.makedirs(entry, exist_ok=True)
+
+        keras_model.save(os.path.join(entry, MODEL_FILENAME))
+        joblib.dump(scalers, os.path.join(entry, SCALERS_FILENAME))
+
+        info = {
+            'currency': currency,
+            'bank': bank,
+            'look_back': look_back,
+            'fingerprint': fingerprint,
+            'saved_at': datetime.now().isoformat(),
+        }
+        info.update(meta or {})
+        # 先写临时文件再替换，meta.json 存在即表示条目完整
+        tmp_path = os.path.join(entry, META_FILENAME + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(entry, META_FILENAME))
+        if self.keep_in_memory:
+            self._loaded[entry] = (keras_model, copy.deepcopy(scalers), info)
+        print(f"Saved model to registry: {entry}", file=sys.stderr)
+        return entry
+
+    def read_meta(self, currency, bank, look_back, fingerprint):
+        """读取条目元数据；不存在时返回 None"""
+        meta_path = os.path.join(self.entry_dir(currency, bank, look_back, fingerprint), META_FILENAME)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def entries(self):
+        """遍历所有完整条目，返回 (currency, bank, look_back, fingerprint) 列表"""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for currency in sorted(os.listdir(self.root)):
+            currency_dir = os.path.join(self.root, currency)
+            if not os.path.isdir(currency_dir) or currency == 'reports':
+                continue
+            for bank in sorted(os.listdir(currency_dir)):
+                bank_dir = os.path.join(currency_dir, bank)
+                for lb_name in sorted(os.listdir(bank_dir)) if os.path.isdir(bank_dir) else []:
+                    if not lb_name.startswith('lb'):
+                        continue
+                    look_back = int(lb_name[2:])
+                    for fingerprint in sorted(os.listdir(os.path.join(bank_dir, lb_name))):
+                        if self.exists(currency, bank, look_back, fingerprint):
+                            found.append((currency, bank, look_back, fingerprint))
+        return found
+
+    def latest(self, currency, bank, look_back, require=None):
+        """返回版本号最高的条目 (fingerprint, meta)；没有条目时返回 None
+
+        require 指定条目中必须存在的文件（如导出的 model.onnx）
+        """
+        base = os.path.join(self.root, currency, bank, f'lb{look_back}')
+        if not os.path.isdir(base):
+            return None
+
+        best = None
+        for fingerprint in os.listdir(base):
+            meta_path = os.path.join(base, fingerprint, META_FILENAME)
+            if not os.path.exists(meta_path):
+                continue
+            if require and not os.path.exists(os.path.join(base, fingerprint, require)):
+                continue
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            key = (meta.get('version', 1), meta.get('saved_at', ''))
+            if best is None or key > best[0]:
+                best = (key, fingerprint, meta)
+        return (best[1], best[2]) if best else None
+
+    def load(self, currency, bank, look_back, fingerprint, cached=True):
+        """加载条目，返回 (keras_model, scalers, meta)；不存在时返回 None
+
+        cached=False 时总是从磁盘加载独立的模型副本（用于继续训练）
+        """
+        entry = self.entry_dir(currency, bank, look_back, fingerprint)
+        if cached and entry in self._loaded:
+            keras_model, scalers, meta = self._loaded[entry]
+            # 返回缩放器副本，避免调用方修改常驻内存中的缩放器
+            return keras_model, copy.deepcopy(scalers), meta
+
+        if not self.exists(currency, bank, look_back, fingerprint):
+            return None
+
+        from tensorflow.keras.models import load_model
+
+        # 模型中包含Lambda层，需要关闭safe_mode才能反序列化
+        keras_model = load_model(os.path.join(entry, MODEL_FILENAME), safe_mode=False)
+        scalers = joblib.load(os.path.join(entry, SCALERS_FILENAME))
+        with open(os.path.join(entry, META_FILENAME), encoding='utf-8') as f:
+            meta = json.load(f)
+        print(f"Loaded model from registry: {entry}", file=sys.stderr)
+        if cached and self.keep_in_memory:
+            self._loaded[entry] = (keras_model, scalers, meta)
+            scalers = copy.deepcopy(scalers)
+        return keras_model, scalers, meta
+
+
+_default_registry = None
+
+
+def get_registry():
+    """进程内共享的注册表实例"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ModelRegistry()
+    return _default_registry
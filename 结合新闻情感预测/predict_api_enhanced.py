@@ -12,6 +12,8 @@ import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 from datetime import datetime, timedelta
 
+from rate_store import load_rate_series
+
 def predict_exchange_rate_with_dataset(currency_pair, days=20, dataset_path=None):
     """
     使用指定数据集进行汇率预测
@@ -49,27 +51,9 @@ def predict_exchange_rate_with_dataset(currency_pair, days=20, dataset_path=None
             print(f"No data file found, using API fallback", file=sys.stderr)
             return predict_with_api_fallback(currency_pair, days, dataset_path)
         
-        # 读取数据并进行简单预测
-        df = pd.read_csv(price_file)
-        print(f"Loaded data with columns: {df.columns.tolist()}", file=sys.stderr)
-        
-        # 找到汇率列
-        rate_column = None
-        for col in ['exchange_rate', 'rate', 'close', 'price']:
-            if col in df.columns:
-                rate_column = col
-                break
-        
-        if rate_column is None:
-            # 使用数值列
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            if len(numeric_cols) > 0:
-                rate_column = numeric_cols[-1]  # 使用最后一个数值列
-            else:
-                raise ValueError("No suitable rate column found")
-        
-        rates = df[rate_column].dropna().values
-        print(f"Using {len(rates)} data points from column '{rate_column}'", file=sys.stderr)
+        # 从列式汇率存储读取（已按日期升序），不再逐次解析CSV
+        rates = np.asarray(load_rate_series(price_file).dropna().values)
+        print(f"Using {len(rates)} data points from rate store", file=sys.stderr)
         
         if len(rates) < 10:
             raise ValueError("Insufficient data for prediction")
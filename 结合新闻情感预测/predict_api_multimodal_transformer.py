@@ -7,13 +7,16 @@
 
 import sys
 import json
-import os
+import time
 import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+from prediction_common import (
+    SUPPORTED_CURRENCIES, find_data_files,
+    build_prediction_result, fallback_prediction
+)
+
 # 尝试导入TensorFlow/Keras，如果失败则降级到简化版本
 try:
     import tensorflow as tf
@@ -25,34 +28,15 @@ try:
         GlobalAveragePooling1D, Lambda
     )
     from sklearn.preprocessing import MinMaxScaler
+    from model_registry import get_registry, file_fingerprint, dataset_name
+    from prepared_dataset import get_prepared_dataset
+    from rate_store import get_store
     TENSORFLOW_AVAILABLE = True
     print("TensorFlow available, using advanced Transformer-LSTM model", file=sys.stderr)
 except ImportError as e:
     TENSORFLOW_AVAILABLE = False
     print(f"TensorFlow not available: {e}, falling back to simplified model", file=sys.stderr)
 
-def series_to_supervised(data, n_in=1, n_out=1, dropnan=True):
-    """转换时间序列数据为监督学习格式"""
-    from pandas import DataFrame, concat
-    
-    n_vars = 1 if type(data) is list else data.shape[1]
-    df = DataFrame(data)
-    cols, names = list(), list()
-    for i in range(n_in, 0, -1):
-        cols.append(df.shift(i))
-        names += [('var%d(t-%d)' % (j+1, i)) for j in range(n_vars)]
-    for i in range(0, n_out):
-        cols.append(df.shift(-i))
-        if i == 0:
-            names += [('var%d(t)' % (j+1)) for j in range(n_vars)]
-        else:
-            names += [('var%d(t+%d)' % (j+1, i)) for j in range(n_vars)]
-    agg = concat(cols, axis=1)
-    agg.columns = names
-    if dropnan:
-        agg.dropna(inplace=True)
-    return agg
-
 if TENSORFLOW_AVAILABLE:
     def positional_encoding(length, depth):
         """位置编码"""
@@ -88,6 +72,54 @@ if TENSORFLOW_AVAILABLE:
         out2 = LayerNormalization(epsilon=1e-6)(out2)
         return out2
 
+    @tf.function(reduce_retracing=True)
+    def rollout_graph(keras_models, counts, price_window, sent_window, days,
+                      y_scale, y_min, price_scale, price_min):
+        """递归预测计算图（整个滚动预测只调用一次图，每组模型只追踪一次）
+
+        多个模型的窗口堆叠为一个批次：keras_models[k] 负责批次中连续的 counts[k] 行，
+        每一步在同一次图调用内对各自的行做前向计算后拼接
+        """
+        bounds = []
+        start = 0
+        for count in counts:
+            bounds.append((start, start + count))
+            start += count
+        # 预分配输出缓冲区，窗口以固定形状在图内滚动
+        outputs = tf.TensorArray(tf.float32, size=days)
+        last_sent = sent_window[:, -1:, :]
+        for i in tf.range(days):
+            pred_norm = tf.concat(
+                [keras_model([price_window[a:b], sent_window[a:b]], training=False)
+                 for keras_model, (a, b) in zip(keras_models, bounds)], axis=0)
+            pred_val = (pred_norm - y_min) / y_scale
+            outputs = outputs.write(i, pred_val[:, 0])
+            next_price = pred_val * price_scale + price_min
+            price_window = tf.concat(
+                [price_window[:, 1:, :], next_price[:, tf.newaxis, :]], axis=1)
+            sent_window = tf.concat([sent_window[:, 1:, :], last_sent], axis=1)
+        return tf.transpose(outputs.stack())
+
+    def rollout_batch(keras_models, counts, price_windows, sent_windows, days, y_scalers, price_scalers):
+        """批量递归预测，每行使用各自的缩放器，返回 (batch, days) 的反归一化结果
+
+        keras_models[k] 负责窗口中连续的 counts[k] 行，不同模型的行在同一次图调用内计算
+        """
+        def affine(scalers):
+            scale = np.array([s.scale_[0] for s in scalers], dtype='float32').reshape(-1, 1)
+            offset = np.array([s.min_[0] for s in scalers], dtype='float32').reshape(-1, 1)
+            return tf.constant(scale), tf.constant(offset)
+
+        y_scale, y_min = affine(y_scalers)
+        price_scale, price_min = affine(price_scalers)
+        result = rollout_graph(
+            tuple(keras_models), tuple(int(c) for c in counts),
+            tf.constant(price_windows, dtype=tf.float32),
+            tf.constant(sent_windows, dtype=tf.float32),
+            tf.constant(days, dtype=tf.int32),
+            y_scale, y_min, price_scale, price_min)
+        return result.numpy().astype('float64')
+
     class MultiModalTransformerLSTMModel:
         def __init__(self, price_path, sentiment_path, look_back=10):
             self.price_path = price_path
@@ -96,62 +128,27 @@ if TENSORFLOW_AVAILABLE:
             self.scaler_price = MinMaxScaler(feature_range=(0, 1))
             self.scaler_sentiment = MinMaxScaler(feature_range=(0, 1))
             self.scaler_y = MinMaxScaler(feature_range=(0, 1))
+            self.dataset = None
             self.model = None
 
+        def load_dataset(self):
+            """加载预处理数据集（同一数据版本在进程内复用），不构造训练窗口"""
+            try:
+                self.dataset = get_prepared_dataset(self.price_path, self.sentiment_path, self.look_back)
+                self.scaler_price = self.dataset.scaler_price
+                self.scaler_sentiment = self.dataset.scaler_sentiment
+                self.scaler_y = self.dataset.scaler_y
+                return True
+            except Exception as e:
+                print(f"Data loading error: {e}", file=sys.stderr)
+                return False
+
         def load_and_prepare_data(self):
-            """加载和准备数据"""
+            """加载数据并构造训练/测试窗口"""
+            if not self.load_dataset():
+                return None, None
             try:
-                price_df = pd.read_csv(self.price_path, header=0, index_col=0)
-                sentiment_df = pd.read_csv(self.sentiment_path, header=0, index_col=0)
-                df = price_df.join(sentiment_df, how='inner')
-                values = df.values.astype('float32')
-
-                total_len = len(values)
-                look_back = self.look_back
-
-                # 分割训练/测试数据
-                train_size = int(total_len * 0.7)
-                train_values = values[:train_size]
-                test_values = values[train_size - look_back:]
-
-                # 拟合缩放器
-                self.scaler_price.fit(train_values[:, 0:1])
-                self.scaler_sentiment.fit(train_values[:, 1:2])
-                self.scaler_y.fit(train_values[:, 0:1])
-
-                # 归一化特征
-                price_train_scaled = self.scaler_price.transform(train_values[:, 0:1])
-                sent_train_scaled = self.scaler_sentiment.transform(train_values[:, 1:2])
-                price_test_scaled = self.scaler_price.transform(test_values[:, 0:1])
-                sent_test_scaled = self.scaler_sentiment.transform(test_values[:, 1:2])
-
-                train_scaled = np.hstack([price_train_scaled, sent_train_scaled])
-                test_scaled = np.hstack([price_test_scaled, sent_test_scaled])
-
-                def window_xy(data_scaled, original_values, start_idx, look_back):
-                    X1, X2, Y = [], [], []
-                    for i in range(len(data_scaled) - look_back):
-                        price_hist = data_scaled[i:i+look_back, 0]
-                        sent_hist = data_scaled[i:i+look_back, 1]
-                        price_next = original_values[start_idx + i + look_back, 0]
-                        X1.append(price_hist)
-                        X2.append(sent_hist)
-                        Y.append(price_next)
-                    X1 = np.array(X1).reshape(-1, look_back, 1)
-                    X2 = np.array(X2).reshape(-1, look_back, 1)
-                    Y = np.array(Y).reshape(-1, 1)
-                    return X1, X2, Y
-
-                price_train_X, sent_train_X, train_y = window_xy(
-                    train_scaled, values, 0, look_back)
-                price_test_X, sent_test_X, test_y = window_xy(
-                    test_scaled, values, train_size - look_back, look_back)
-
-                # 归一化y
-                train_y_scaled = self.scaler_y.transform(train_y)
-                test_y_scaled = self.scaler_y.transform(test_y)
-
-                return (price_train_X, sent_train_X, train_y_scaled), (price_test_X, sent_test_X, test_y_scaled)
+                return self.dataset.train_data, self.dataset.test_data
             except Exception as e:
                 print(f"Data loading error: {e}", file=sys.stderr)
                 return None, None
@@ -202,51 +199,234 @@ if TENSORFLOW_AVAILABLE:
             )
             return history
 
+        def fine_tune(self, new_data, replay_data, epochs=5, batch_size=32, replay_size=128):
+            """在已加载模型上只用新增窗口微调，并混入部分历史窗口回放以防遗忘
+
+            new_data / replay_data 为 (价格窗口, 情感窗口, 目标值)，需用模型自己的缩放器构造
+            """
+            replay_count = len(replay_data[2])
+            replay_idx = np.sort(np.random.default_rng().choice(
+                replay_count, size=min(replay_size, replay_count), replace=False))
+            price_X, sentiment_X, y = (np.concatenate([old[replay_idx], new])
+                                       for old, new in zip(replay_data, new_data))
+            history = self.model.fit(
+                [price_X, sentiment_X], y,
+                epochs=epochs,
+                batch_size=batch_size,
+                verbose=0,
+                shuffle=True,
+            )
+            return history
+
         def predict(self, price_X, sentiment_X):
             """预测"""
             yhat = self.model.predict([price_X, sentiment_X], verbose=0)
             yhat_inv = self.scaler_y.inverse_transform(yhat)
             return yhat_inv
 
-        def predict_recursive(self, days=20, scale=1000000):
+        @property
+        def scalers(self):
+            return {
+                'price': self.scaler_price,
+                'sentiment': self.scaler_sentiment,
+                'y': self.scaler_y,
+            }
+
+        def save_to_registry(self, registry, currency, bank, fingerprint, meta=None):
+            """保存模型和缩放器到注册表"""
+            return registry.save(currency, bank, self.look_back, fingerprint,
+                                 self.model, self.scalers, meta)
+
+        def load_from_registry(self, registry, currency, bank, fingerprint):
+            """从注册表加载模型和缩放器，成功返回True"""
+            entry = registry.load(currency, bank, self.look_back, fingerprint)
+            if entry is None:
+                return False
+            self.model, scalers, _ = entry
+            self.scaler_price = scalers['price']
+            self.scaler_sentiment = scalers['sentiment']
+            self.scaler_y = scalers['y']
+            return True
+
+        def rollout(self, price_windows, sent_windows, days, y_scalers, price_scalers):
+            """用本模型对一批窗口递归预测，每个样本使用各自的缩放器，返回 (batch, days)"""
+            return rollout_batch((self.model,), (len(price_windows),), price_windows, sent_windows,
+                                 days, y_scalers, price_scalers)
+
+        def prepare_forecast_window(self):
+            """返回最近的预测起始窗口，使用模型训练时的缩放器，不再在全量数据上重新拟合"""
+            if self.dataset is None:
+                self.dataset = get_prepared_dataset(self.price_path, self.sentiment_path, self.look_back)
+            return self.dataset.forecast_window(self.scaler_price, self.scaler_sentiment)
+
+        def predict_recursive(self, days=20):
             """递归预测未来多天"""
-            # 获取最近的数据作为起始窗口
-            price_df = pd.read_csv(self.price_path, header=0, index_col=0)
-            sentiment_df = pd.read_csv(self.sentiment_path, header=0, index_col=0)
-            df = price_df.join(sentiment_df, how='inner').astype("float64")
-            
-            # 放大精度
-            df.iloc[:, 0] *= scale
-            
-            # 准备缩放器
-            price = df.iloc[:, 0].values.reshape(-1, 1)
-            sent = df.iloc[:, 1].values.reshape(-1, 1)
-            self.scaler_price.fit(price)
-            self.scaler_sentiment.fit(sent)
-            self.scaler_y.fit(price)
-            
-            # 获取最近的窗口数据
-            price_scaled_full = self.scaler_price.transform(price)
-            sent_scaled_full = self.scaler_sentiment.transform(sent)
-            
-            price_scaled = price_scaled_full[-self.look_back:]
-            sent_scaled = sent_scaled_full[-self.look_back:]
-            
-            predictions = []
-            for i in range(days):
-                price_input = price_scaled[-self.look_back:].reshape(1, self.look_back, 1)
-                sent_input = sent_scaled[-self.look_back:].reshape(1, self.look_back, 1)
-                pred_norm = self.model.predict([price_input, sent_input], verbose=0)
-                pred_val_scaled = self.scaler_y.inverse_transform(pred_norm)[0, 0]
-                pred_val = pred_val_scaled / scale
-                predictions.append(pred_val)
-                
-                # 更新窗口
-                next_price_scaled = self.scaler_price.transform([[pred_val_scaled]])
-                price_scaled = np.vstack([price_scaled, next_price_scaled])[1:, :]
-                sent_scaled = np.vstack([sent_scaled, [sent_scaled[-1]]])[1:, :]
-            
-            return np.array(predictions)
+            price_window, sent_window = self.prepare_forecast_window()
+            predictions = self.rollout(price_window, sent_window, days,
+                                       [self.scaler_y], [self.scaler_price])[0]
+            return predictions
+
+# 输入窗口天数（注册表条目按此区分）
+LOOK_BACK = 20
+# 增量微调轮数，以及连续增量更新多少次后强制完整重训
+FINE_TUNE_EPOCHS = 5
+MAX_INCREMENTAL_UPDATES = 30
+
+def load_trained_model(currency_pair, dataset_path=None, look_back=LOOK_BACK):
+    """从注册表加载或训练模型，返回 (model, data_points)；数据不可用时返回 None"""
+    base_path, price_file, sentiment_file = find_data_files(currency_pair, dataset_path)
+    if not price_file or not sentiment_file:
+        print(f"Missing data files for {currency_pair}, using fallback", file=sys.stderr)
+        return None
+    
+    print(f"Using price file: {price_file}", file=sys.stderr)
+    print(f"Using sentiment file: {sentiment_file}", file=sys.stderr)
+    
+    # 创建和训练模型
+    model = MultiModalTransformerLSTMModel(price_file, sentiment_file, look_back=look_back)
+    
+    # 加载数据（训练窗口只在需要训练时构造）
+    if not model.load_dataset():
+        return None
+    
+    # 数据文件未变化时直接复用已训练模型
+    registry = get_registry()
+    bank = dataset_name(base_path)
+    fingerprint = file_fingerprint(price_file, sentiment_file)
+    
+    with registry.entry_lock(currency_pair, bank, model.look_back, fingerprint):
+        if not model.load_from_registry(registry, currency_pair, bank, fingerprint):
+            fit_and_register(model, registry, currency_pair, bank, fingerprint, model.dataset.train_data)
+    
+    return model, model.dataset.data_points
+
+def incremental_data(model, registry, currency_pair, bank, parent, previous_meta, rate_entry):
+    """上一版本与当前数据属于汇率存储中同一条追加序列时，返回 (上一版本条目, 新增窗口, 回放窗口)
+
+    要求同一组数据文件、同一基准版本，且上一版本之后确实追加了新行；
+    窗口使用上一版本保存的缩放器构造，不重新拟合。新增的行还没有对应的情感数据、
+    没有可训练的新窗口时，新增窗口和回放窗口为 None，调用方直接沿用上一版本。
+    不满足时返回 None，调用方完整训练
+    """
+    parent_rate_version = previous_meta.get('rate_version')
+    if (rate_entry is None or parent_rate_version is None
+            or previous_meta.get('rate_base_version') != rate_entry['base_version']
+            or previous_meta.get('price_file') != model.price_path
+            or previous_meta.get('sentiment_file') != model.sentiment_path):
+        return None
+    try:
+        since = get_store().rows_since(model.price_path, parent_rate_version)
+    except Exception as e:
+        print(f"Rate store lineage unavailable: {e}", file=sys.stderr)
+        return None
+    if since is None or not len(since[1]):
+        return None
+
+    # 新增日期在对齐数据中的起始行；历史不足一个窗口时无法增量
+    dataset = model.dataset
+    first_new_row = dataset.row_index(since[1][0])
+    if first_new_row <= model.look_back:
+        return None
+
+    # 独立加载上一版本，避免修改常驻内存中的旧模型
+    entry = registry.load(currency_pair, bank, model.look_back, parent, cached=False)
+    if entry is None:
+        return None
+    if first_new_row >= len(dataset.values):
+        # 新日期还没有情感数据，对齐后没有新窗口
+        return entry, None, None
+    replay_data, new_data = dataset.split_windows(first_new_row, entry[1])
+    return entry, new_data, replay_data
+
+def fit_and_register(model, registry, currency_pair, bank, fingerprint, train_data,
+                     epochs=50, batch_size=32, incremental=True):
+    """训练模型并保存到注册表，返回元数据
+
+    注册表中的上一版本与当前数据属于汇率存储中同一条追加序列时，加载上一版本及其缩放器，
+    只在上一版本之后追加的行上微调，没有可训练的新窗口时直接沿用上一版本；
+    连续增量更新达到上限或数据被整体改写后重新完整训练
+    """
+    price_train_X, sent_train_X, train_y = train_data
+    train_samples = len(train_y)
+
+    # 汇率存储中的数据版本在训练前读取，存储不可用时不影响训练，只是记录为 None
+    try:
+        rate_entry = get_store().entry_for_source(model.price_path)
+    except Exception as e:
+        print(f"Rate store version unavailable: {e}", file=sys.stderr)
+        rate_entry = None
+
+    mode = 'full'
+    version = 1
+    parent = None
+    incremental_count = 0
+    increment = None
+
+    rate_version = rate_entry['version'] if rate_entry else None
+    previous = registry.latest(currency_pair, bank, model.look_back) if incremental else None
+    if previous is not None:
+        parent, previous_meta = previous
+        version = previous_meta.get('version', 1) + 1
+        previous_count = previous_meta.get('incremental_count', 0)
+        if previous_count < MAX_INCREMENTAL_UPDATES:
+            increment = incremental_data(model, registry, currency_pair, bank, parent,
+                                         previous_meta, rate_entry)
+        if increment is not None and increment[1] is None:
+            mode = 'reused'
+            incremental_count = previous_count
+            # 记录上一版本的数据版本：这些新行的情感数据到达后，下次仍能把它们当作新增行微调
+            rate_version = previous_meta.get('rate_version')
+        elif increment is not None:
+            mode = 'incremental'
+            incremental_count = previous_count + 1
+
+    start_time = time.time()
+    if increment is not None:
+        (model.model, scalers, _), new_data, replay_data = increment
+        model.scaler_price = scalers['price']
+        model.scaler_sentiment = scalers['sentiment']
+        model.scaler_y = scalers['y']
+
+    if mode == 'reused':
+        print("No new aligned windows since the previous version, reusing it without training",
+              file=sys.stderr)
+        new_samples = 0
+        epochs = 0
+        final_loss = previous_meta.get('final_loss')
+    elif mode == 'incremental':
+        new_samples = len(new_data[2])
+        print(f"Fine-tuning Transformer-LSTM model on {new_samples} new windows...", file=sys.stderr)
+        epochs = FINE_TUNE_EPOCHS
+        history = model.fine_tune(new_data, replay_data, epochs=epochs, batch_size=batch_size)
+        final_loss = float(history.history['loss'][-1])
+    else:
+        # 训练模型（快速训练用于API）
+        print(f"Training Transformer-LSTM model...", file=sys.stderr)
+        new_samples = train_samples
+        history = model.train(price_train_X, sent_train_X, train_y, epochs=epochs, batch_size=batch_size)
+        final_loss = float(history.history['loss'][-1])
+
+    meta = {
+        'price_file': model.price_path,
+        'sentiment_file': model.sentiment_path,
+        'version': version,
+        'mode': mode,
+        'parent': parent,
+        'train_samples': train_samples,
+        'new_samples': new_samples,
+        # 汇率存储中的数据版本和基准版本，下次用 rows_since 取得此后追加的数据
+        'rate_version': rate_version,
+        'rate_base_version': rate_entry['base_version'] if rate_entry else None,
+        'incremental_count': incremental_count,
+        'epochs': epochs,
+        'final_loss': final_loss,
+        'train_seconds': round(time.time() - start_time, 2),
+    }
+    try:
+        model.save_to_registry(registry, currency_pair, bank, fingerprint, meta)
+    except Exception as e:
+        print(f"Failed to save model to registry: {e}", file=sys.stderr)
+    return meta
 
 def predict_with_transformer_lstm(currency_pair, days=20, dataset_path=None):
     """使用Transformer-LSTM模型进行预测"""
@@ -256,189 +436,68 @@ def predict_with_transformer_lstm(currency_pair, days=20, dataset_path=None):
         
         print(f"Starting Transformer-LSTM prediction for {currency_pair}", file=sys.stderr)
         
-        # 确定数据文件路径
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        if dataset_path and os.path.exists(dataset_path):
-            base_path = dataset_path
-        else:
-            base_path = script_dir
-        
-        # 查找价格和情感数据文件
-        price_file = None
-        sentiment_file = None
-        
-        price_patterns = [
-            f'CNY_{currency_pair}_to_exchange_rate.csv',
-            f'{currency_pair}_to_exchange_rate.csv'
-        ]
-        
-        sentiment_patterns = [
-            f'{currency_pair}_sentiment.csv',
-            f'CNY_{currency_pair}_sentiment.csv'
-        ]
-        
-        for pattern in price_patterns:
-            file_path = os.path.join(base_path, pattern)
-            if os.path.exists(file_path):
-                price_file = file_path
-                break
-        
-        for pattern in sentiment_patterns:
-            file_path = os.path.join(base_path, pattern)
-            if os.path.exists(file_path):
-                sentiment_file = file_path
-                break
-        
-        if not price_file or not sentiment_file:
-            print(f"Missing data files for {currency_pair}, using fallback", file=sys.stderr)
+        loaded = load_trained_model(currency_pair, dataset_path)
+        if loaded is None:
             return fallback_prediction(currency_pair, days)
-        
-        print(f"Using price file: {price_file}", file=sys.stderr)
-        print(f"Using sentiment file: {sentiment_file}", file=sys.stderr)
-        
-        # 创建和训练模型
-        model = MultiModalTransformerLSTMModel(price_file, sentiment_file, look_back=20)
-        
-        # 加载数据
-        train_data, test_data = model.load_and_prepare_data()
-        if train_data is None:
-            return fallback_prediction(currency_pair, days)
-        
-        price_train_X, sent_train_X, train_y = train_data
-        
-        # 训练模型（快速训练用于API）
-        print(f"Training Transformer-LSTM model...", file=sys.stderr)
-        model.train(price_train_X, sent_train_X, train_y, epochs=50, batch_size=32)
+        model, data_points = loaded
         
         # 递归预测
         predictions = model.predict_recursive(days=days)
-        
-        # 生成预测结果
-        today = datetime.now()
-        prediction_list = []
-        
-        for i, pred_rate in enumerate(predictions):
-            prediction_date = today + timedelta(days=i+1)
-            prediction_list.append({
-                'date': prediction_date.strftime('%Y-%m-%d'),
-                'rate': float(pred_rate),
-                'timestamp': int(prediction_date.timestamp() * 1000),
-                'method': 'Transformer-LSTM'
-            })
-        
-        # 找出最优点
-        max_rate = max(pred['rate'] for pred in prediction_list)
-        for pred in prediction_list:
-            if pred['rate'] == max_rate:
-                pred['isOptimal'] = True
-                break
-        
-        # 计算技术指标
-        rates = [p['rate'] for p in prediction_list]
-        avg_rate = np.mean(rates)
-        volatility = np.std(rates) / avg_rate
-        
-        return {
-            'success': True,
-            'currency_pair': f'CNY_{currency_pair}',
-            'predictions': prediction_list,
-            'prediction_days': days,
-            'model_type': 'Multimodal Transformer-LSTM Neural Network',
-            'data_source': f'Historical Price + Sentiment Data',
-            'data_points': len(price_train_X) + len(sent_train_X),
-            'technical_indicators': {
-                'rsi': 50.0,  # 简化
-                'macd': 0.0,
-                'bollinger': 'MIDDLE',
-                'support': float(min(rates) * 0.995),
-                'resistance': float(max(rates) * 1.005)
-            },
-            'market_sentiment': {
-                'score': 60,
-                'trend': 'BULLISH' if predictions[-1] > predictions[0] else 'BEARISH',
-                'volatility': float(volatility * 100)
-            },
-            'recommendation': f'基于Transformer-LSTM多模态深度学习模型的预测，结合了价格趋势和市场情感分析',
-            'volatility': float(volatility),
-            'trend': "上升" if predictions[-1] > predictions[0] else "下降",
-            'confidence': 85  # Transformer-LSTM模型置信度较高
-        }
+        return build_prediction_result(currency_pair, days, predictions, data_points)
         
     except Exception as e:
         print(f"Transformer-LSTM prediction failed: {str(e)}", file=sys.stderr)
         return fallback_prediction(currency_pair, days)
 
-def fallback_prediction(currency_pair, days):
-    """降级预测方法"""
-    try:
-        print(f"Using fallback prediction for {currency_pair}", file=sys.stderr)
-        
-        # 基础汇率
-        base_rates = {
-            'SGD': 5.2, 'HKD': 0.92, 'JPY': 0.049, 
-            'KRW': 0.0054, 'THB': 0.197, 'MYR': 1.58,
-            'USD': 7.2, 'EUR': 7.8, 'GBP': 9.1
-        }
-        
-        current_rate = base_rates.get(currency_pair, 1.0)
-        daily_volatility = 0.008
-        
-        predictions = []
-        today = datetime.now()
-        
-        for i in range(days):
-            change = np.random.normal(0, daily_volatility)
-            current_rate *= (1 + change)
-            
-            prediction_date = today + timedelta(days=i+1)
-            
-            predictions.append({
-                'date': prediction_date.strftime('%Y-%m-%d'),
-                'rate': float(current_rate),
-                'timestamp': int(prediction_date.timestamp() * 1000),
-                'method': 'Fallback-Prediction'
-            })
-        
-        # 找出最优点
-        max_rate = max(pred['rate'] for pred in predictions)
-        for pred in predictions:
-            if pred['rate'] == max_rate:
-                pred['isOptimal'] = True
-                break
-        
-        return {
-            'success': True,
-            'currency_pair': f'CNY_{currency_pair}',
-            'predictions': predictions,
-            'prediction_days': days,
-            'model_type': 'Fallback Statistical Model',
-            'data_source': 'Market Reference Data',
-            'technical_indicators': {
-                'rsi': 50.0,
-                'macd': 0.0,
-                'bollinger': 'MIDDLE',
-                'support': float(min(pred['rate'] for pred in predictions)),
-                'resistance': float(max(pred['rate'] for pred in predictions))
-            },
-            'market_sentiment': {
-                'score': 50,
-                'trend': 'NEUTRAL',
-                'volatility': daily_volatility * 100
-            },
-            'recommendation': f'基于统计模型的预测，当前参考汇率约{base_rates.get(currency_pair, 1.0):.4f}',
-            'volatility': daily_volatility,
-            'trend': '稳定'
-        }
-        
-    except Exception as e:
-        print(f"Error in fallback prediction: {str(e)}", file=sys.stderr)
-        return {
-            'success': False,
-            'error': str(e),
-            'currency_pair': f'CNY_{currency_pair}',
-            'details': f'所有预测方法均失败: {str(e)}'
-        }
+def predict_all(days=20, dataset_path=None, currencies=None):
+    """一次调用预测多个货币对
+
+    输入窗口形状相同（同一模型结构）的所有货币对，预测起始窗口堆叠为一个批次，
+    只调用一次递归预测图；各货币对的模型负责各自的行，共用同一权重的行合并前向计算
+    """
+    currencies = currencies or SUPPORTED_CURRENCIES
+    if not TENSORFLOW_AVAILABLE:
+        return {currency_pair: fallback_prediction(currency_pair, days) for currency_pair in currencies}
+
+    print(f"Starting batched Transformer-LSTM prediction for {', '.join(currencies)}", file=sys.stderr)
+
+    results = {}
+    # look_back -> {id(keras 模型): [(货币对, 模型, 数据点数, 价格窗口, 情感窗口)]}
+    groups = {}
+    for currency_pair in currencies:
+        try:
+            loaded = load_trained_model(currency_pair, dataset_path)
+            if loaded is None:
+                results[currency_pair] = fallback_prediction(currency_pair, days)
+                continue
+            model, data_points = loaded
+            price_window, sent_window = model.prepare_forecast_window()
+            groups.setdefault(model.look_back, {}).setdefault(id(model.model), []).append(
+                (currency_pair, model, data_points, price_window, sent_window))
+        except Exception as e:
+            print(f"Transformer-LSTM preparation failed for {currency_pair}: {str(e)}", file=sys.stderr)
+            results[currency_pair] = fallback_prediction(currency_pair, days)
+
+    for by_model in groups.values():
+        # 同一模型的行在批次中连续排列
+        members = [member for rows in by_model.values() for member in rows]
+        try:
+            predictions = rollout_batch(
+                [rows[0][1].model for rows in by_model.values()],
+                [len(rows) for rows in by_model.values()],
+                np.concatenate([m[3] for m in members]),
+                np.concatenate([m[4] for m in members]),
+                days,
+                [m[1].scaler_y for m in members],
+                [m[1].scaler_price for m in members])
+            for row, (currency_pair, _, data_points, _, _) in zip(predictions, members):
+                results[currency_pair] = build_prediction_result(currency_pair, days, row, data_points)
+        except Exception as e:
+            print(f"Batched Transformer-LSTM prediction failed: {str(e)}", file=sys.stderr)
+            for currency_pair, *_ in members:
+                results[currency_pair] = fallback_prediction(currency_pair, days)
+
+    return {currency_pair: results[currency_pair] for currency_pair in currencies}
 
 def main():
     if len(sys.argv) < 2:
@@ -451,7 +510,10 @@ def main():
     
     print(f"Starting Multimodal Transformer-LSTM prediction for {currency_pair}, {days} days", file=sys.stderr)
     
-    result = predict_with_transformer_lstm(currency_pair, days, dataset_path)
+    if currency_pair.upper() == 'ALL':
+        result = predict_all(days, dataset_path)
+    else:
+        result = predict_with_transformer_lstm(currency_pair, days, dataset_path)
     print(json.dumps(result, ensure_ascii=False, indent=2))
 
 if __name__ == '__main__':
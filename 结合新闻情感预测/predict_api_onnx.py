@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime推理版Transformer-LSTM汇率预测API
+使用 export_onnx.py 导出的模型，推理过程不导入TensorFlow，
+适合只做预测的常驻或批量工作进程
+"""
+
+import sys
+import json
+import os
+import threading
+import numpy as np
+import warnings
+warnings.filterwarnings('ignore')
+
+import joblib
+
+from prediction_common import (
+    SUPPORTED_CURRENCIES, find_data_files,
+    build_prediction_result, fallback_prediction
+)
+from prepared_dataset import get_prepared_dataset
+from model_registry import get_registry, file_fingerprint, dataset_name, ONNX_FILENAME, SCALERS_FILENAME
+
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError as e:
+    ONNX_AVAILABLE = False
+    print(f"ONNX Runtime not available: {e}, falling back to simplified model", file=sys.stderr)
+
+LOOK_BACK = 20
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class OnnxTransformerLSTMPredictor:
+    def __init__(self, onnx_path, look_back=LOOK_BACK):
+        self.onnx_path = onnx_path
+        self.look_back = look_back
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.price_input = self.session.get_inputs()[0].name
+        self.sentiment_input = self.session.get_inputs()[1].name
+        # 使用与模型同一注册表条目中保存的缩放器，保证预测窗口与训练时缩放一致
+        self.scalers = joblib.load(os.path.join(os.path.dirname(onnx_path), SCALERS_FILENAME))
+
+    def prepare_forecast_window(self, price_path, sentiment_path):
+        """返回 (价格窗口, 情感窗口, 数据点数)"""
+        dataset = get_prepared_dataset(price_path, sentiment_path, self.look_back)
+        price_window, sent_window = dataset.forecast_window(self.scalers['price'], self.scalers['sentiment'])
+        return price_window.astype('float32'), sent_window.astype('float32'), dataset.data_points
+
+    def rollout(self, price_window, sent_window, days):
+        """递归预测未来多天"""
+        y_scale, y_min = self.scalers['y'].scale_[0], self.scalers['y'].min_[0]
+        price_scale, price_min = self.scalers['price'].scale_[0], self.scalers['price'].min_[0]
+        last_sent = sent_window[:, -1:, :]
+        predictions = np.empty(days, dtype='float64')
+        for i in range(days):
+            pred_norm = self.session.run(None, {
+                self.price_input: price_window,
+                self.sentiment_input: sent_window,
+            })[0]
+            pred_val = (float(pred_norm[0, 0]) - y_min) / y_scale
+            predictions[i] = pred_val
+
+            # 更新窗口
+            next_price = np.float32(pred_val * price_scale + price_min)
+            price_window = np.concatenate(
+                [price_window[:, 1:, :], np.full((1, 1, 1), next_price, dtype='float32')], axis=1)
+            sent_window = np.concatenate([sent_window[:, 1:, :], last_sent], axis=1)
+        return predictions
+
+
+def get_predictor(onnx_path):
+    """常驻进程中复用已创建的推理会话"""
+    with _sessions_lock:
+        if onnx_path not in _sessions:
+            _sessions[onnx_path] = OnnxTransformerLSTMPredictor(onnx_path)
+        return _sessions[onnx_path]
+
+
+def find_onnx_model(currency_pair, base_path, price_file, sentiment_file):
+    """查找当前数据对应的ONNX模型，未导出时使用最近一次导出的版本"""
+    registry = get_registry()
+    bank = dataset_name(base_path)
+    fingerprint = file_fingerprint(price_file, sentiment_file)
+    onnx_path = os.path.join(registry.entry_dir(currency_pair, bank, LOOK_BACK, fingerprint), ONNX_FILENAME)
+    if os.path.exists(onnx_path):
+        return onnx_path
+
+    latest = registry.latest(currency_pair, bank, LOOK_BACK, require=ONNX_FILENAME)
+    if latest is None:
+        return None
+    print(f"No ONNX export for current data of {currency_pair}, using version {latest[1].get('version')}",
+          file=sys.stderr)
+    return os.path.join(registry.entry_dir(currency_pair, bank, LOOK_BACK, latest[0]), ONNX_FILENAME)
+
+
+def predict_with_onnx(currency_pair, days=20, dataset_path=None):
+    """使用导出的ONNX模型进行预测"""
+    try:
+        if not ONNX_AVAILABLE:
+            return fallback_prediction(currency_pair, days)
+
+        print(f"Starting ONNX Transformer-LSTM prediction for {currency_pair}", file=sys.stderr)
+
+        base_path, price_file, sentiment_file = find_data_files(currency_pair, dataset_path)
+        if not price_file or not sentiment_file:
+            print(f"Missing data files for {currency_pair}, using fallback", file=sys.stderr)
+            return fallback_prediction(currency_pair, days)
+
+        onnx_path = find_onnx_model(currency_pair, base_path, price_file, sentiment_file)
+        if onnx_path is None:
+            print(f"No exported ONNX model for {currency_pair}, using fallback", file=sys.stderr)
+            return fallback_prediction(currency_pair, days)
+
+        predictor = get_predictor(onnx_path)
+        price_window, sent_window, data_points = predictor.prepare_forecast_window(price_file, sentiment_file)
+        predictions = predictor.rollout(price_window, sent_window, days)
+        return build_prediction_result(currency_pair, days, predictions, data_points)
+
+    except Exception as e:
+        print(f"ONNX Transformer-LSTM prediction failed: {str(e)}", file=sys.stderr)
+        return fallback_prediction(currency_pair, days)
+
+
+def predict_all(days=20, dataset_path=None, currencies=None):
+    """一次调用预测所有支持的货币对"""
+    currencies = currencies or SUPPORTED_CURRENCIES
+    return {currency_pair: predict_with_onnx(currency_pair, days, dataset_path)
+            for currency_pair in currencies}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(json.dumps({'success': False, 'error': 'Currency pair not specified'}))
+        sys.exit(1)
+
+    currency_pair = sys.argv[1]
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    dataset_path = sys.argv[3] if len(sys.argv) > 3 else None
+
+    print(f"Starting ONNX Transformer-LSTM prediction for {currency_pair}, {days} days", file=sys.stderr)
+
+    if currency_pair.upper() == 'ALL':
+        result = predict_all(days, dataset_path)
+    else:
+        result = predict_with_onnx(currency_pair, days, dataset_path)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
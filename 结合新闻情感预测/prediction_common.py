@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+汇率预测公共工具
+数据文件查找、价格/情感数据对齐、结果格式化和降级预测，
+不依赖TensorFlow，供训练版和推理版预测API共用
+"""
+
+import sys
+import os
+import numpy as np
+from datetime import datetime, timedelta
+
+from rate_store import load_aligned_frame
+
+SUPPORTED_CURRENCIES = ['JPY', 'HKD', 'SGD', 'THB', 'MYR', 'KRW']
+
+def read_price_sentiment(price_path, sentiment_path):
+    """读取价格和情感数据并按日期对齐
+
+    对齐结果由汇率存储保存为共享的只读内存映射，多个预测进程读取同一份数据
+    """
+    return load_aligned_frame(price_path, sentiment_path)
+
+def find_data_files(currency_pair, dataset_path=None):
+    """查找价格和情感数据文件，返回 (base_path, price_file, sentiment_file)"""
+    # 确定数据文件路径
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    if dataset_path and os.path.exists(dataset_path):
+        base_path = dataset_path
+    else:
+        base_path = script_dir
+    
+    # 查找价格和情感数据文件
+    price_file = None
+    sentiment_file = None
+    
+    price_patterns = [
+        f'CNY_{currency_pair}_to_exchange_rate.csv',
+        f'{currency_pair}_to_exchange_rate.csv'
+    ]
+    
+    sentiment_patterns = [
+        f'{currency_pair}_sentiment.csv',
+        f'CNY_{currency_pair}_sentiment.csv'
+    ]
+    
+    for pattern in price_patterns:
+        file_path = os.path.join(base_path, pattern)
+        if os.path.exists(file_path):
+            price_file = file_path
+            break
+    
+    # 银行数据集目录下没有情感数据时，使用本目录下的通用情感数据
+    for directory in dict.fromkeys([base_path, script_dir]):
+        for pattern in sentiment_patterns:
+            file_path = os.path.join(directory, pattern)
+            if os.path.exists(file_path):
+                sentiment_file = file_path
+                break
+        if sentiment_file:
+            break
+    
+    return base_path, price_file, sentiment_file
+
+def build_prediction_result(currency_pair, days, predictions, data_points):
+    """将预测序列整理为API返回格式"""
+    # 生成预测结果
+    today = datetime.now()
+    prediction_list = []
+    
+    for i, pred_rate in enumerate(predictions):
+        prediction_date = today + timedelta(days=i+1)
+        prediction_list.append({
+            'date': prediction_date.strftime('%Y-%m-%d'),
+            'rate': float(pred_rate),
+            'timestamp': int(prediction_date.timestamp() * 1000),
+            'method': 'Transformer-LSTM'
+        })
+    
+    # 找出最优点
+    max_rate = max(pred['rate'] for pred in prediction_list)
+    for pred in prediction_list:
+        if pred['rate'] == max_rate:
+            pred['isOptimal'] = True
+            break
+    
+    # 计算技术指标
+    rates = [p['rate'] for p in prediction_list]
+    avg_rate = np.mean(rates)
+    volatility = np.std(rates) / avg_rate
+    
+    return {
+        'success': True,
+        'currency_pair': f'CNY_{currency_pair}',
+        'predictions': prediction_list,
+        'prediction_days': days,
+        'model_type': 'Multimodal Transformer-LSTM Neural Network',
+        'data_source': 'Historical Price + Sentiment Data',
+        'data_points': data_points,
+        'technical_indicators': {
+            'rsi': 50.0,  # 简化
+            'macd': 0.0,
+            'bollinger': 'MIDDLE',
+            'support': float(min(rates) * 0.995),
+            'resistance': float(max(rates) * 1.005)
+        },
+        'market_sentiment': {
+            'score': 60,
+            'trend': 'BULLISH' if predictions[-1] > predictions[0] else 'BEARISH',
+            'volatility': float(volatility * 100)
+        },
+        'recommendation': '基于Transformer-LSTM多模态深度学习模型的预测，结合了价格趋势和市场情感分析',
+        'volatility': float(volatility),
+        'trend': "上升" if predictions[-1] > predictions[0] else "下降",
+        'confidence': 85  # Transformer-LSTM模型置信度较高
+    }
+
+def fallback_prediction(currency_pair, days):
+    """降级预测方法"""
+    try:
+        print(f"Using fallback prediction for {currency_pair}", file=sys.stderr)
+        
+        # 基础汇率
+        base_rates = {
+            'SGD': 5.2, 'HKD': 0.92, 'JPY': 0.049, 
+            'KRW': 0.0054, 'THB': 0.197, 'MYR': 1.58,
+            'USD': 7.2, 'EUR': 7.8, 'GBP': 9.1
+        }
+        
+        current_rate = base_rates.get(currency_pair, 1.0)
+        daily_volatility = 0.008
+        
+        predictions = []
+        today = datetime.now()
+        
+        for i in range(days):
+            change = np.random.normal(0, daily_volatility)
+            current_rate *= (1 + change)
+            
+            prediction_date = today + timedelta(days=i+1)
+            
+            predictions.append({
+                'date': prediction_date.strftime('%Y-%m-%d'),
+                'rate': float(current_rate),
+                'timestamp': int(prediction_date.timestamp() * 1000),
+                'method': 'Fallback-Prediction'
+            })
+        
+        # 找出最优点
+        max_rate = max(pred['rate'] for pred in predictions)
+        for pred in predictions:
+            if pred['rate'] == max_rate:
+                pred['isOptimal'] = True
+                break
+        
+        return {
+            'success': True,
+            'currency_pair': f'CNY_{currency_pair}',
+            'predictions': predictions,
+            'prediction_days': days,
+            'model_type': 'Fallback Statistical Model',
+            'data_source': 'Market Reference Data',
+            'technical_indicators': {
+                'rsi': 50.0,
+                'macd': 0.0,
+                'bollinger': 'MIDDLE',
+                'support': float(min(pred['rate'] for pred in predictions)),
+                'resistance': float(max(pred['rate'] for pred in predictions))
+            },
+            'market_sentiment': {
+                'score': 50,
+                'trend': 'NEUTRAL',
+                'volatility': daily_volatility * 100
+            },
+            'recommendation': f'基于统计模型的预测，当前参考汇率约{base_rates.get(currency_pair, 1.0):.4f}',
+            'volatility': daily_volatility,
+            'trend': '稳定'
+        }
+        
+    except Exception as e:
+        print(f"Error in fallback prediction: {str(e)}", file=sys.stderr)
+        return {
+            'success': False,
+            'error': str(e),
+            'currency_pair': f'CNY_{currency_pair}',
+            'details': f'所有预测方法均失败: {str(e)}'
+        }
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+常驻汇率预测服务
+进程启动时一次性导入TensorFlow（或ONNX Runtime），已加载的模型常驻内存，
+对外提供与 predict_api_*.py 脚本相同的JSON结果
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime
+
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+
+import predict_api_enhanced as enhanced_api
+from prediction_common import SUPPORTED_CURRENCIES, find_data_files
+from model_registry import get_registry, file_fingerprint, dataset_name
+from forecast_cache import ForecastCache, data_version
+
+# PREDICTION_RUNTIME=onnx 时使用导出的ONNX模型推理，进程不导入TensorFlow
+PREDICTION_RUNTIME = os.environ.get('PREDICTION_RUNTIME', 'tensorflow')
+if PREDICTION_RUNTIME == 'onnx':
+    import predict_api_onnx as onnx_api
+    predict_transformer = onnx_api.predict_with_onnx
+    predict_transformer_all = onnx_api.predict_all
+    RUNTIME_AVAILABLE = onnx_api.ONNX_AVAILABLE
+    MODEL_LOOK_BACK = onnx_api.LOOK_BACK
+else:
+    import predict_api_multimodal_transformer as transformer_api
+    predict_transformer = transformer_api.predict_with_transformer_lstm
+    predict_transformer_all = transformer_api.predict_all
+    RUNTIME_AVAILABLE = transformer_api.TENSORFLOW_AVAILABLE
+    MODEL_LOOK_BACK = transformer_api.LOOK_BACK
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+app = Flask(__name__)
+CORS(app)
+
+# 常驻进程中保留已加载的模型
+get_registry().keep_in_memory = True
+STARTED_AT = datetime.now()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ENHANCED_DEFAULT_DATASET = os.path.join(SCRIPT_DIR, '..', 'Rate LSTM')
+
+forecast_cache = ForecastCache(
+    max_entries=int(os.environ.get('FORECAST_CACHE_SIZE', 256)),
+    ttl=int(os.environ.get('FORECAST_CACHE_TTL', 3600))
+)
+
+
+def transformer_model_identity(currency_pair, base_path, price_file, sentiment_file):
+    """当前数据对应的 Transformer 模型标识；尚未训练/导出时返回 None
+
+    TensorFlow 运行时为注册表条目的指纹、版本和保存时间，ONNX 运行时为实际使用的导出文件版本，
+    重新训练或导出后旧的缓存结果不再命中
+    """
+    if not price_file or not sentiment_file:
+        return None
+    if PREDICTION_RUNTIME == 'onnx':
+        onnx_path = onnx_api.find_onnx_model(currency_pair, base_path, price_file, sentiment_file)
+        return data_version(onnx_path) if onnx_path else None
+    fingerprint = file_fingerprint(price_file, sentiment_file)
+    meta = get_registry().read_meta(currency_pair, dataset_name(base_path), MODEL_LOOK_BACK, fingerprint)
+    return (fingerprint, meta.get('version'), meta.get('saved_at')) if meta else None
+
+
+def cache_key(currency_pair, days, dataset_path, model_type):
+    """按请求参数、所用数据文件的版本和模型标识构造缓存键"""
+    if model_type == 'transformer':
+        base_path, price_file, sentiment_file = find_data_files(currency_pair, dataset_path)
+        version = data_version(price_file, sentiment_file)
+        model = transformer_model_identity(currency_pair, base_path, price_file, sentiment_file)
+        model_type = f'transformer:{PREDICTION_RUNTIME}'
+    else:
+        # enhanced 每次请求直接由数据文件计算，没有单独的模型版本
+        _, price_file, _ = find_data_files(currency_pair, dataset_path or ENHANCED_DEFAULT_DATASET)
+        version = data_version(price_file)
+        model = None
+        model_type = 'enhanced'
+    return forecast_cache.make_key(model_type, currency_pair, days, dataset_path, version, model)
+
+
+def run_prediction(currency_pair, days, dataset_path, model_type):
+    """按模型类型分发到对应的预测函数（结果经过缓存）"""
+    def compute():
+        if model_type == 'transformer':
+            return predict_transformer(currency_pair, days, dataset_path)
+        # universal 脚本尚未实现，与 enhanced 共用LSTM数据集预测
+        return enhanced_api.predict_exchange_rate_with_dataset(currency_pair, days, dataset_path)
+
+    key = cache_key(currency_pair, days, dataset_path, model_type)
+    return forecast_cache.get_or_compute(key, compute)
+
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """健康检查"""
+    return jsonify({
+        'status': 'healthy',
+        'service': 'rate_prediction_server',
+        'runtime': PREDICTION_RUNTIME,
+        'runtime_available': RUNTIME_AVAILABLE,
+        'loaded_models': len(get_registry().loaded_entries()),
+        'forecast_cache': forecast_cache.stats(),
+        'started_at': STARTED_AT.isoformat(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    """汇率预测接口"""
+    try:
+        data = request.get_json() or {}
+
+        currency_pair = data.get('currency')
+        if currency_pair not in SUPPORTED_CURRENCIES:
+            return jsonify({
+                'success': False,
+                'error': f'Currency {currency_pair} is not supported. Supported currencies: {", ".join(SUPPORTED_CURRENCIES)}'
+            }), 400
+
+        days = int(data.get('days', 20))
+        dataset_path = data.get('dataset_path') or None
+        model_type = data.get('modelType', 'transformer')
+
+        logger.info(f"预测请求: {currency_pair}, {days}天, 模型: {model_type}, 数据集: {dataset_path}")
+        result = run_prediction(currency_pair, days, dataset_path, model_type)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"预测失败: {e}")
+        return jsonify({'success': False, 'error': f'预测失败: {str(e)}'}), 500
+
+
+@app.route('/predict_all', methods=['POST'])
+def predict_all():
+    """一次预测所有支持的货币对"""
+    try:
+        data = request.get_json() or {}
+        days = int(data.get('days', 20))
+        dataset_path = data.get('dataset_path') or None
+        currencies = data.get('currencies') or SUPPORTED_CURRENCIES
+
+        unsupported = [c for c in currencies if c not in SUPPORTED_CURRENCIES]
+        if unsupported:
+            return jsonify({
+                'success': False,
+                'error': f'Currencies not supported: {", ".join(unsupported)}'
+            }), 400
+
+        logger.info(f"批量预测请求: {currencies}, {days}天, 数据集: {dataset_path}")
+
+        # 只对缓存未命中的货币做批量预测
+        results = {}
+        keys = {}
+        for currency_pair in currencies:
+            keys[currency_pair] = cache_key(currency_pair, days, dataset_path, 'transformer')
+            cached = forecast_cache.get(keys[currency_pair])
+            if cached is not None:
+                results[currency_pair] = cached
+
+        missing = [c for c in currencies if c not in results]
+        if missing:
+            for currency_pair, result in predict_transformer_all(days, dataset_path, missing).items():
+                forecast_cache.put(keys[currency_pair], result)
+                results[currency_pair] = result
+
+        return jsonify({'success': True, 'results': {c: results[c] for c in currencies}})
+
+    except Exception as e:
+        logger.error(f"批量预测失败: {e}")
+        return jsonify({'success': False, 'error': f'批量预测失败: {str(e)}'}), 500
+
+
+@app.route('/cache', methods=['GET', 'DELETE'])
+def cache_stats():
+    """预测缓存统计；DELETE 清空缓存"""
+    if request.method == 'DELETE':
+        forecast_cache.clear()
+    return jsonify(forecast_cache.stats())
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PREDICTION_SERVER_PORT', 5003))
+    print("启动汇率预测服务...", file=sys.stderr)
+    print(f"服务地址: http://localhost:{port}", file=sys.stderr)
+    print(f"健康检查: http://localhost:{port}/health", file=sys.stderr)
+    print(f"汇率预测: POST http://localhost:{port}/predict", file=sys.stderr)
+    print(f"批量预测: POST http://localhost:{port}/predict_all", file=sys.stderr)
+
+    app.run(
+        host='127.0.0.1',
+        port=port,
+        debug=False,
+        threaded=True
+    )
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+训练/预测共用的预处理数据集
+对齐数据只读取一次，缩放器只在训练集上拟合一次，训练窗口、测试窗口和预测起始窗口
+都使用同一组缩放参数，按数据文件版本在进程内缓存；
+训练/测试窗口只在训练或评估时首次访问才构造，推理只需要预测起始窗口
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import cached_property
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from windowing import window_xy
+from rate_store import load_aligned_values, source_stat
+
+TRAIN_RATIO = 0.7
+MAX_CACHED_DATASETS = 64
+
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+
+
+class PreparedDataset:
+    def __init__(self, price_path, sentiment_path, look_back, train_ratio=TRAIN_RATIO):
+        self.price_path = price_path
+        self.sentiment_path = sentiment_path
+        self.look_back = look_back
+
+        # 对齐数据是共享的 float32 只读内存映射，这里只取视图，各进程不复制私有副本
+        aligned = load_aligned_values(price_path, sentiment_path)
+        self.values = aligned[:, 1:3]
+        self.days = aligned[:, 0]
+        self.train_size = int(len(self.values) * train_ratio)
+        if self.train_size <= look_back:
+            raise ValueError(f'Not enough data: {len(self.values)} rows for look_back={look_back}')
+
+        train_values = self.values[:self.train_size]
+        self.scaler_price = MinMaxScaler(feature_range=(0, 1)).fit(train_values[:, 0:1])
+        self.scaler_sentiment = MinMaxScaler(feature_range=(0, 1)).fit(train_values[:, 1:2])
+        self.scaler_y = MinMaxScaler(feature_range=(0, 1)).fit(train_values[:, 0:1])
+
+    @cached_property
+    def train_data(self):
+        return self._windows(0, self.train_size)
+
+    @cached_property
+    def test_data(self):
+        return self._windows(self.train_size - self.look_back, len(self.values))
+
+    def _scale(self, values, scaler_price=None, scaler_sentiment=None):
+        return np.hstack([
+            (scaler_price or self.scaler_price).transform(values[:, 0:1]),
+            (scaler_sentiment or self.scaler_sentiment).transform(values[:, 1:2]),
+        ])
+
+    def _windows(self, start, end, scalers=None):
+        """构造 [start, end) 区间的 (价格窗口, 情感窗口, 归一化目标值)
+
+        scalers 为已训练模型保存的 {'price', 'sentiment', 'y'}，默认使用本数据集拟合的缩放器
+        """
+        scalers = scalers or {'price': self.scaler_price, 'sentiment': self.scaler_sentiment,
+                              'y': self.scaler_y}
+        price_X, sent_X, y = window_xy(
+            self._scale(self.values[start:end], scalers['price'], scalers['sentiment']),
+            self.values, start, self.look_back)
+        return price_X, sent_X, scalers['y'].transform(y)
+
+    def row_index(self, date):
+        """第一个日期不早于 date 的对齐行号"""
+        day = np.datetime64(date, 'D').astype('int64')
+        return int(np.searchsorted(self.days, day))
+
+    def split_windows(self, row, scalers):
+        """用给定缩放器构造目标值在 row 行之前和从 row 行开始的两组窗口"""
+        return (self._windows(0, row, scalers),
+                self._windows(row - self.look_back, len(self.values), scalers))
+
+    def test_windows(self, scalers=None):
+        """测试集窗口，传入模型保存的缩放器时与模型训练时的缩放一致"""
+        if scalers is None:
+            return self.test_data
+        return self._windows(self.train_size - self.look_back, len(self.values), scalers)
+
+    @property
+    def data_points(self):
+        """训练窗口数（价格与情感两路输入合计），不需要构造窗口"""
+        return 2 * (self.train_size - self.look_back)
+
+    def forecast_window(self, scaler_price=None, scaler_sentiment=None):
+        """最近 look_back 天的预测起始窗口
+
+        默认使用本数据集拟合的缩放器；传入已训练模型保存的缩放器时，窗口与模型训练时的缩放一致
+        """
+        scaled = self._scale(self.values[-self.look_back:], scaler_price, scaler_sentiment)
+        price_window = scaled[:, 0].reshape(1, self.look_back, 1)
+        sent_window = scaled[:, 1].reshape(1, self.look_back, 1)
+        return price_window, sent_window
+
+
+def get_prepared_dataset(price_path, sentiment_path, look_back):
+    """按 (文件, look_back, 文件版本) 复用已准备好的数据集"""
+    price_path = os.path.abspath(price_path)
+    sentiment_path = os.path.abspath(sentiment_path)
+    key = (price_path, sentiment_path, look_back, source_stat(price_path), source_stat(sentiment_path))
+    with _datasets_lock:
+        dataset = _datasets.get(key)
+        if dataset is not None:
+            _datasets.move_to_end(key)
+            return dataset
+
+    dataset = PreparedDataset(price_path, sentiment_path, look_back)
+    with _datasets_lock:
+        _datasets[key] = dataset
+        while len(_datasets) > MAX_CACHED_DATASETS:
+            _datasets.popitem(last=False)
+    return dataset
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+历史汇率列式存储
+将 Rate LSTM/、Rate LSTM/bank-data/* 及本目录下各种格式的汇率文件
+（无表头的 2023/7/10,0.051363、带表头的 Date,Exchange_Rate、倒序的 _no_rev、
+银行导出的制表符分隔 .txt）统一解析一次，按日期升序保存为可内存映射的 numpy 数组，
+预测脚本读取时不再解析文本；价格与情感按日期对齐后的数据集同样保存为单个数组文件，
+各预测工作进程以只读内存映射共享同一份物理内存
+
+源文件只在末尾追加新日期时增量导入，每次导入记录一个版本号，
+下游可以通过 rows_since(源文件, 版本) 只读取该版本之后新增的行
+
+用法:
+    python3 rate_store.py            # 导入所有数据已变化的汇率文件
+    python3 rate_store.py --force    # 全部重新导入
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = os.path.join(SCRIPT_DIR, 'rate_store')
+DEFAULT_DATA_ROOTS = [SCRIPT_DIR, os.path.join(SCRIPT_DIR, '..', 'Rate LSTM')]
+
+MANIFEST_FILENAME = 'manifest.json'
+DATES_FILENAME = 'dates.npy'
+RATES_FILENAME = 'rates.npy'
+ALIGNED_DIRNAME = 'aligned'
+# 对齐数据集直接以模型输入的精度保存，读取方取视图即可，不需要再转换复制
+# （日期序号小于 2**24，float32 可以精确表示）
+ALIGNED_DTYPE = 'float32'
+# 清单中为每个序列保留的版本历史条数
+MAX_VERSION_HISTORY = 100
+
+RATE_FILE_PATTERN = re.compile(r'^(?:CNY_)?([A-Z]{3})_to_exchange_rate\.(csv|csv_no_rev|txt)$')
+# 同一数据集同一货币有多个文件时，优先使用已整理好的升序CSV
+SOURCE_PRIORITY = {'csv': 0, 'csv_no_rev': 1, 'txt': 2}
+
+
+def parse_rate_text(buffer, sep=','):
+    """解析汇率文本（文件路径或文件对象），返回按日期升序、日期唯一的 (dates, rates)"""
+    try:
+        df = pd.read_csv(buffer, sep=sep, header=None, usecols=[0, 1], dtype=str,
+                         skipinitialspace=True, encoding='utf-8')
+    except pd.errors.EmptyDataError:
+        return np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype='float64')
+    # 表头行（Date,Exchange_Rate / 日期 现钞卖出价）的汇率列不是数值，直接过滤
+    rates = pd.to_numeric(df[1].str.strip(), errors='coerce')
+    df = df[rates.notna()]
+    dates = pd.to_datetime(df[0].str.strip().str.replace('/', '-'), errors='coerce')
+
+    series = pd.Series(rates[rates.notna()].values, index=dates.values)
+    series = series[series.index.notna()].sort_index()
+    series = series[~series.index.duplicated(keep='last')]
+    return series.index.values.astype('datetime64[D]'), series.values.astype('float64')
+
+
+def rate_file_separator(path):
+    return '\t' if path.endswith('.txt') else ','
+
+
+def parse_rate_file(path):
+    """解析任意格式的汇率文件，返回按日期升序、日期唯一的 (dates, rates)"""
+    return parse_rate_text(path, rate_file_separator(path))
+
+
+def tail_digest(path, size, length=4096):
+    """文件前 size 字节中最后 length 字节的摘要，用于判断文件是否只是在末尾追加"""
+    with open(path, 'rb') as f:
+        f.seek(max(size - length, 0))
+        return hashlib.sha256(f.read(min(size, length))).hexdigest()[:16]
+
+
+def append_npy(path, array, rows=None):
+    """原地向一维 .npy 文件末尾追加数据
+
+    先写数据再改写头部中的 shape；np.save 写出的头部为 shape 增长预留了空间，
+    空间不足或 dtype 不一致时返回 False，由调用方整体重写。
+    rows 为清单中已提交的行数：上次追加后、清单写入前中断留下的多余数据先截掉，
+    新数据从已提交的末尾写起；文件比清单记录的还短时返回 False
+    """
+    array = np.ascontiguousarray(array)
+    with open(path, 'r+b') as f:
+        major, _ = np.lib.format.read_magic(f)
+        if major == 1:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        data_offset = f.tell()
+        if len(shape) != 1 or fortran_order or dtype != array.dtype:
+            return False
+        if rows is None:
+            rows = shape[0]
+        end = data_offset + rows * dtype.itemsize
+        if rows > shape[0] or os.fstat(f.fileno()).st_size < end:
+            return False
+
+        # 魔数6字节 + 版本2字节 + 头部长度字段（1.0版2字节，其余4字节）
+        header_start = 8 + (2 if major == 1 else 4)
+        header = str({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                      'shape': (rows + len(array),)})
+        space = data_offset - header_start
+        if len(header) + 1 > space:
+            return False
+
+        f.truncate(end)
+        f.seek(end)
+        f.write(array.tobytes())
+        f.flush()
+        f.seek(header_start)
+        f.write((header + ' ' * (space - len(header) - 1) + '\n').encode('latin1'))
+    return True
+
+
+def save_npy_atomic(path, array):
+    """写同目录下的唯一临时文件后原子替换，多个进程/线程同时写同一路径互不覆盖临时文件"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        # mkstemp 创建的文件只有属主可读，改回普通数据文件的权限
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def store_file_lock(root):
+    """跨进程的存储写锁，防止多个进程同时追加同一序列"""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, '.lock'), 'w') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def discover_rate_files(data_roots=None):
+    """发现所有数据集目录下的汇率文件，返回 {(数据集目录, 货币): 源文件}"""
+    datasets = []
+    for root in data_roots or DEFAULT_DATA_ROOTS:
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            continue
+        datasets.append(root)
+        bank_root = os.path.join(root, 'bank-data')
+        if os.path.isdir(bank_root):
+            datasets += [os.path.join(bank_root, name) for name in sorted(os.listdir(bank_root))
+                         if os.path.isdir(os.path.join(bank_root, name))]
+
+    sources = {}
+    for dataset_path in datasets:
+        candidates = {}
+        for filename in os.listdir(dataset_path):
+            match = RATE_FILE_PATTERN.match(filename)
+            if match:
+                currency, kind = match.groups()
+                candidates.setdefault(currency, []).append((SOURCE_PRIORITY[kind], filename))
+        for currency, files in candidates.items():
+            sources[(dataset_path, currency)] = os.path.join(dataset_path, min(files)[1])
+    return sources
+
+
+def series_key(dataset_path, currency):
+    """存储条目键：数据集目录绝对路径 + 货币"""
+    return f'{os.path.abspath(dataset_path)}::{currency}'
+
+
+def source_stat(path):
+    """文件版本 (修改时间, 大小)，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class RateStore:
+    def __init__(self, root=None):
+        self.root = root or os.environ.get('RATE_STORE_DIR', DEFAULT_STORE_DIR)
+        # 可重入：ingest 等持锁方法内部还会调用 manifest()
+        self._lock = threading.RLock()
+        self._manifest = None
+        # 本进程已映射的对齐数据集：路径 -> ((inode, 修改时间), 数组)
+        self._mapped = {}
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_FILENAME)
+
+    def manifest(self):
+        """读取清单（进程内缓存）"""
+        with self._lock:
+            if self._manifest is None:
+                if os.path.exists(self.manifest_path):
+                    with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                        self._manifest = json.load(f)
+                else:
+                    self._manifest = {'series': {}, 'sources': {}}
+                self._manifest.setdefault('aligned', {})
+            return self._manifest
+
+    def _write_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=MANIFEST_FILENAME + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def series_dir(self, dataset_path, currency):
+        """条目目录：数据集名称加路径哈希，区分不同位置的同名银行目录"""
+        dataset_path = os.path.abspath(dataset_path)
+        digest = hashlib.sha256(dataset_path.encode('utf-8')).hexdigest()[:8]
+        name = os.path.basename(os.path.normpath(dataset_path)).replace(' ', '_')
+        return os.path.join(self.root, f'{name}-{digest}', currency)
+
+    def is_fresh(self, entry):
+        """源文件修改时间和大小均未变化"""
+        return source_stat(entry['source']) == (entry['mtime_ns'], entry['size'])
+
+    def ingest(self, source_path, dataset_path, currency, force=False):
+        """导入单个汇率文件，返回清单条目
+
+        源文件只是在末尾追加了更晚日期的行时，只解析新增部分并原地追加到数组文件，
+        I/O与新增数据量成正比；否则整体重新解析并原子替换
+        """
+        source_path = os.path.abspath(source_path)
+        key = series_key(dataset_path, currency)
+        with self._lock, store_file_lock(self.root):
+            # 其他进程可能已经导入过，重新读取清单
+            self._manifest = None
+            previous = self.manifest()['series'].get(key)
+            same_source = previous is not None and previous['source'] == source_path
+            if same_source and not force and self.is_fresh(previous):
+                return previous
+
+            stat = os.stat(source_path)
+            entry = None
+            if same_source and not force:
+                entry = self._append(previous, stat)
+            if entry is None:
+                entry = self._rewrite(previous, source_path, dataset_path, currency, stat)
+
+            manifest = self.manifest()
+            manifest['series'][key] = entry
+            manifest['sources'][source_path] = key
+            self._write_manifest()
+        return entry
+
+    def _rewrite(self, previous, source_path, dataset_path, currency, stat):
+        """整体解析源文件并原子替换数组文件，开始新的基准版本"""
+        dates, rates = parse_rate_file(source_path)
+
+        entry_dir = self.series_dir(dataset_path, currency)
+        os.makedirs(entry_dir, exist_ok=True)
+        for filename, array in ((DATES_FILENAME, dates), (RATES_FILENAME, rates)):
+            save_npy_atomic(os.path.join(entry_dir, filename), array)
+
+        version = previous['version'] + 1 if previous and 'version' in previous else 1
+        return {
+            'source': source_path,
+            'dataset': os.path.abspath(dataset_path),
+            'currency': currency,
+            'dir': os.path.relpath(entry_dir, self.root),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'tail_digest': tail_digest(source_path, stat.st_size),
+            'rows': int(len(rates)),
+            'first_date': str(dates[0]) if len(dates) else None,
+            'last_date': str(dates[-1]) if len(dates) else None,
+            'version': version,
+            # 早于基准版本的数据已被整体替换，无法增量读取
+            'base_version': version,
+            'versions': [[version, int(len(rates))]],
+            'ingested_at': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def _append(self, previous, stat):
+        """源文件只在末尾追加了新日期的行时，增量追加；无法增量时返回 None"""
+        source_path = previous['source']
+        old_size = previous['size']
+        if 'version' not in previous or stat.st_size <= old_size:
+            return None
+        with open(source_path, 'rb') as f:
+            if old_size:
+                f.seek(old_size - 1)
+                # 上次导入时最后一行没有换行符，新内容可能是该行的延续
+                if f.read(1) != b'\n':
+                    return None
+            appended = f.read()
+        if tail_digest(source_path, old_size) != previous['tail_digest']:
+            return None
+
+        dates, rates = parse_rate_text(io.StringIO(appended.decode('utf-8')),
+                                       rate_file_separator(source_path))
+        last_date = np.datetime64(previous['last_date'], 'D') if previous['last_date'] else None
+        if len(dates) and last_date is not None and dates[0] <= last_date:
+            # 补录了更早日期的数据，需要整体重排
+            return None
+
+        entry_dir = os.path.join(self.root, previous['dir'])
+        if len(dates):
+            # 按清单行数追加：上次追加写了列文件但清单未写入时，残留的行被覆盖
+            if not (append_npy(os.path.join(entry_dir, DATES_FILENAME), dates, previous['rows']) and
+                    append_npy(os.path.join(entry_dir, RATES_FILENAME), rates, previous['rows'])):
+                return None
+
+        entry = dict(previous)
+        version = previous['version'] + 1
+        rows = previous['rows'] + int(len(rates))
+        entry.update({
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'tail_digest': tail_digest(source_path, stat.st_size),
+            'rows': rows,
+            'first_date': previous['first_date'] or (str(dates[0]) if len(dates) else None),
+            'last_date': str(dates[-1]) if len(dates) else previous['last_date'],
+            'version': version,
+            'versions': (previous['versions'] + [[version, rows]])[-MAX_VERSION_HISTORY:],
+            'ingested_at': datetime.now().isoformat(timespec='seconds'),
+        })
+        print(f"Appended {len(rates)} rows to rate store: {source_path}", file=sys.stderr)
+        return entry
+
+    def build(self, data_roots=None, force=False):
+        """导入所有发现的汇率文件，返回 (已导入, 未变化) 条目列表"""
+        ingested, unchanged = [], []
+        for (dataset_path, currency), source_path in sorted(discover_rate_files(data_roots).items()):
+            entry = self.manifest()['series'].get(series_key(dataset_path, currency))
+            if not force and entry and entry['source'] == os.path.abspath(source_path) and self.is_fresh(entry):
+                unchanged.append(entry)
+                continue
+            ingested.append(self.ingest(source_path, dataset_path, currency, force=force))
+        return ingested, unchanged
+
+    def _open(self, entry):
+        entry_dir = os.path.join(self.root, entry['dir'])
+        dates = np.load(os.path.join(entry_dir, DATES_FILENAME), mmap_mode='r')
+        rates = np.load(os.path.join(entry_dir, RATES_FILENAME), mmap_mode='r')
+        # 数组文件可能正在被追加，只读取清单中已确认的行数
+        return dates[:entry['rows']], rates[:entry['rows']]
+
+    def entry_for_source(self, source_path):
+        """源文件对应的最新清单条目，未导入或源文件已变化时先导入"""
+        source_path = os.path.abspath(source_path)
+        key = self.manifest()['sources'].get(source_path)
+        entry = self.manifest()['series'].get(key) if key else None
+        if entry is None or entry['source'] != source_path or not self.is_fresh(entry):
+            if entry is not None and entry['source'] == source_path:
+                dataset_path, currency = entry['dataset'], entry['currency']
+            else:
+                match = RATE_FILE_PATTERN.match(os.path.basename(source_path))
+                dataset_path = os.path.dirname(source_path)
+                currency = match.group(1) if match else os.path.basename(source_path)
+            entry = self.ingest(source_path, dataset_path, currency)
+        return entry
+
+    def version(self, source_path):
+        """源文件在存储中的当前版本号，每次导入新数据加一"""
+        return self.entry_for_source(source_path)['version']
+
+    def rows_since(self, source_path, version):
+        """返回 (当前版本, 版本 version 之后新增的 dates, rates)
+
+        version 早于最近一次整体重写（或已不在版本历史中）时返回 None，调用方需要全量读取
+        """
+        entry = self.entry_for_source(source_path)
+        if version < entry['base_version']:
+            return None
+        rows_at = dict(entry['versions']).get(version)
+        if rows_at is None:
+            return None
+        dates, rates = self._open(entry)
+        return entry['version'], dates[rows_at:], rates[rows_at:]
+
+    def load_source(self, source_path):
+        """按源文件路径读取 (dates, rates) 只读内存映射；未导入或源文件已变化时先导入"""
+        return self._open(self.entry_for_source(source_path))
+
+    def load(self, currency, dataset_path):
+        """按 (货币, 数据集目录) 读取 (dates, rates)"""
+        entry = self.manifest()['series'].get(series_key(dataset_path, currency))
+        if entry is None or not self.is_fresh(entry):
+            source_path = discover_rate_files([dataset_path]).get((os.path.abspath(dataset_path), currency))
+            if source_path is None:
+                raise FileNotFoundError(f'No rate file for {currency} in {dataset_path}')
+            return self.load_source(source_path)
+        return self._open(entry)
+
+    def aligned_path(self, price_path, sentiment_path):
+        """对齐数据集文件路径，每个 (价格文件, 情感文件) 组合一个文件"""
+        digest = hashlib.sha256(f'{price_path}|{sentiment_path}'.encode('utf-8')).hexdigest()[:12]
+        dataset = os.path.basename(os.path.dirname(price_path)).replace(' ', '_')
+        name = os.path.basename(price_path).split('.')[0]
+        return os.path.join(self.root, ALIGNED_DIRNAME, f'{dataset}-{name}-{digest}.npy')
+
+    @staticmethod
+    def _aligned_fresh(entry):
+        """对齐数据集存在、精度与当前版本一致且两个源文件都未变化"""
+        return (entry is not None and entry.get('dtype') == ALIGNED_DTYPE
+                and all(source_stat(p) == (mtime_ns, size) for p, mtime_ns, size in entry['sources']))
+
+    def _build_aligned(self, price_path, sentiment_path):
+        """按日期内连接价格与情感数据，写临时文件后原子替换
+
+        整个重建在进程内锁和跨进程文件锁内进行，并发请求只重建一次；
+        已映射旧文件的进程继续使用旧inode上的数据，新打开的进程看到新数据
+        """
+        # 价格文件需要时先导入；导入自己会取文件锁，不能在下面持锁时进行
+        price_entry = self.entry_for_source(price_path)
+        key = f'{price_path}|{sentiment_path}'
+        with self._lock, store_file_lock(self.root):
+            # 其他线程或进程可能已经重建过，重新读取清单
+            self._manifest = None
+            if self._aligned_fresh(self.manifest()['aligned'].get(key)):
+                return
+
+            sentiment_stat = source_stat(sentiment_path)
+            price_dates, price = self._open(price_entry)
+            sent_dates, sent = parse_rate_file(sentiment_path)
+            values = align_values(price_dates, price, sent_dates, sent)
+
+            path = self.aligned_path(price_path, sentiment_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            save_npy_atomic(path, values)
+
+            self.manifest()['aligned'][key] = {
+                'path': os.path.relpath(path, self.root),
+                # 记录实际读取的版本，读取后源文件再变化时下次会重新对齐
+                'sources': [[price_path, price_entry['mtime_ns'], price_entry['size']],
+                            [sentiment_path, *sentiment_stat]],
+                'rows': int(len(values)),
+                'dtype': ALIGNED_DTYPE,
+            }
+            self._write_manifest()
+
+    def _map(self, path):
+        """内存映射对齐数据集，文件被原子替换后重新映射"""
+        stat = os.stat(path)
+        ident = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            mapped = self._mapped.get(path)
+            if mapped is None or mapped[0] != ident:
+                mapped = (ident, np.load(path, mmap_mode='r'))
+                self._mapped[path] = mapped
+            return mapped[1]
+
+    def aligned(self, price_path, sentiment_path):
+        """价格与情感按日期对齐的只读共享数组 (n, 3)：[日期序号, 价格, 情感]"""
+        price_path = os.path.abspath(price_path)
+        sentiment_path = os.path.abspath(sentiment_path)
+        if not self._aligned_fresh(self.manifest()['aligned'].get(f'{price_path}|{sentiment_path}')):
+            self._build_aligned(price_path, sentiment_path)
+        return self._map(self.aligned_path(price_path, sentiment_path))
+
+    def aligned_frame(self, price_path, sentiment_path):
+        """对齐数据集的DataFrame视图，数据列直接引用内存映射不复制"""
+        return aligned_values_frame(self.aligned(price_path, sentiment_path))
+
+    def series(self, source_path):
+        """按源文件路径读取以日期为索引的汇率序列"""
+        dates, rates = self.load_source(source_path)
+        return pd.Series(rates, index=pd.DatetimeIndex(dates), name='rate')
+
+
+def align_values(price_dates, price, sent_dates, sent):
+    """按日期内连接价格与情感数据，返回 (n, 3) 数组：[日期序号, 价格, 情感]"""
+    dates, price_idx, sent_idx = np.intersect1d(price_dates, sent_dates, return_indices=True)
+    values = np.empty((len(dates), 3), dtype=ALIGNED_DTYPE)
+    values[:, 0] = dates.astype('datetime64[D]').astype('int64')
+    values[:, 1] = price[price_idx]
+    values[:, 2] = sent[sent_idx]
+    return values
+
+
+def aligned_values_frame(values):
+    """对齐数组的DataFrame视图，数据列直接引用原数组不复制"""
+    index = pd.DatetimeIndex(values[:, 0].astype('int64').astype('datetime64[D]'))
+    return pd.DataFrame(values[:, 1:3], index=index, columns=['rate', 'sentiment'], copy=False)
+
+
+_store = None
+
+
+def get_store():
+    """进程内共享的汇率存储实例"""
+    global _store
+    if _store is None:
+        _store = RateStore()
+    return _store
+
+
+def load_rate_series(source_path):
+    """读取汇率序列；存储目录不可写时直接解析源文件"""
+    try:
+        return get_store().series(source_path)
+    except OSError as e:
+        print(f"Rate store unavailable ({e}), parsing {source_path} directly", file=sys.stderr)
+        dates, rates = parse_rate_file(source_path)
+        return pd.Series(rates, index=pd.DatetimeIndex(dates), name='rate')
+
+
+def load_aligned_values(price_path, sentiment_path):
+    """读取价格与情感对齐后的 (n, 3) float32 数组；存储目录不可写时直接解析源文件"""
+    try:
+        return get_store().aligned(price_path, sentiment_path)
+    except OSError as e:
+        print(f"Rate store unavailable ({e}), aligning {price_path} directly", file=sys.stderr)
+        return align_values(*parse_rate_file(price_path), *parse_rate_file(sentiment_path))
+
+
+def load_aligned_frame(price_path, sentiment_path):
+    """读取价格与情感对齐后的数据"""
+    return aligned_values_frame(load_aligned_values(price_path, sentiment_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将历史汇率文件导入列式存储')
+    parser.add_argument('--data-root', nargs='*', help='汇率数据根目录（默认本目录和 Rate LSTM/）')
+    parser.add_argument('--force', action='store_true', help='源文件未变化也重新导入')
+    args = parser.parse_args()
+
+    store = get_store()
+    ingested, unchanged = store.build(args.data_root, args.force)
+    for entry in ingested:
+        print(f"Ingested {entry['source']}: {entry['rows']} rows "
+              f"{entry['first_date']} ~ {entry['last_date']}", file=sys.stderr)
+
+    print(json.dumps({
+        'store': store.root,
+        'ingested': len(ingested),
+        'unchanged': len(unchanged),
+        'series': len(store.manifest()['series']),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
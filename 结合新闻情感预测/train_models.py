@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+离线批量训练命令行工具
+发现 Rate LSTM/ 及 Rate LSTM/bank-data/* 下所有 (货币, 银行数据集) 组合，
+使用进程池并行训练 Transformer-LSTM 模型并写入模型注册表，同时输出训练报告
+
+用法:
+    python3 train_models.py                      # 训练所有数据已变化的模型
+    python3 train_models.py --workers 4 --threads 2
+    python3 train_models.py --currencies JPY HKD --full --force
+    python3 train_models.py --export-onnx        # 同时导出ONNX供 predict_api_onnx.py 使用
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_ROOT = os.path.join(SCRIPT_DIR, '..', 'Rate LSTM')
+
+PRICE_FILE_PATTERN = re.compile(r'^(?:CNY_)?([A-Z]{3})_to_exchange_rate\.csv$')
+
+# 工作进程中的预测模块，在限制线程数之后才导入TensorFlow
+transformer_api = None
+
+
+def discover_jobs(data_root, currencies=None):
+    """发现所有 (货币, 数据集目录) 组合"""
+    datasets = [data_root]
+    bank_root = os.path.join(data_root, 'bank-data')
+    if os.path.isdir(bank_root):
+        datasets += [os.path.join(bank_root, name) for name in sorted(os.listdir(bank_root))
+                     if os.path.isdir(os.path.join(bank_root, name))]
+
+    jobs = []
+    for dataset_path in datasets:
+        found = set()
+        for filename in sorted(os.listdir(dataset_path)):
+            match = PRICE_FILE_PATTERN.match(filename)
+            if match:
+                found.add(match.group(1))
+        for currency in sorted(found):
+            if currencies and currency not in currencies:
+                continue
+            jobs.append((currency, os.path.abspath(dataset_path)))
+    return jobs
+
+
+def init_worker(threads):
+    """工作进程初始化：限制TensorFlow线程数后再导入"""
+    global transformer_api
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    import predict_api_multimodal_transformer
+    transformer_api = predict_api_multimodal_transformer
+
+
+def train_job(currency, dataset_path, look_back, epochs, full, force, export_onnx=False):
+    """训练单个模型，返回训练报告"""
+    from model_registry import get_registry, file_fingerprint, dataset_name
+
+    start_time = time.time()
+    report = {
+        'currency': currency,
+        'dataset': dataset_path,
+        'look_back': look_back,
+    }
+    try:
+        base_path, price_file, sentiment_file = transformer_api.find_data_files(currency, dataset_path)
+        if not price_file or not sentiment_file:
+            report.update({'status': 'skipped', 'reason': 'missing price or sentiment file'})
+            return report
+
+        registry = get_registry()
+        bank = dataset_name(base_path)
+        fingerprint = file_fingerprint(price_file, sentiment_file)
+        report.update({'bank': bank, 'fingerprint': fingerprint})
+
+        if not force and registry.exists(currency, bank, look_back, fingerprint):
+            meta = registry.read_meta(currency, bank, look_back, fingerprint)
+            report.update({'status': 'up_to_date', 'version': meta.get('version')})
+            return report
+
+        model = transformer_api.MultiModalTransformerLSTMModel(price_file, sentiment_file, look_back=look_back)
+        if not model.load_dataset():
+            report.update({'status': 'failed', 'reason': 'data preparation failed'})
+            return report
+
+        meta = transformer_api.fit_and_register(
+            model, registry, currency, bank, fingerprint, model.dataset.train_data,
+            epochs=epochs, incremental=not full)
+
+        # 增量模式沿用上一版本的缩放器，测试窗口按模型实际使用的缩放器构造
+        price_test_X, sent_test_X, test_y = model.dataset.test_windows(model.scalers)
+        test_loss = float(model.model.evaluate([price_test_X, sent_test_X], test_y, verbose=0))
+
+        if export_onnx:
+            from export_onnx import export_entry
+            report['onnx'] = export_entry(registry, currency, bank, look_back, fingerprint)
+
+        report.update({
+            'status': 'trained',
+            'mode': meta['mode'],
+            'version': meta['version'],
+            'train_samples': meta['train_samples'],
+            'epochs': meta['epochs'],
+            'final_loss': meta['final_loss'],
+            'test_loss': test_loss,
+            'train_seconds': meta['train_seconds'],
+        })
+    except Exception as e:
+        report.update({'status': 'failed', 'reason': str(e)})
+    finally:
+        report['wall_seconds'] = round(time.time() - start_time, 2)
+    return report
+
+
+def write_report(reports, registry_root):
+    """写入本次训练的汇总报告"""
+    report_dir = os.path.join(registry_root, 'reports')
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.join(report_dir, f"train-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
+    return report_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量训练Transformer-LSTM汇率预测模型')
+    parser.add_argument('--data-root', default=DEFAULT_DATA_ROOT, help='汇率数据根目录')
+    parser.add_argument('--currencies', nargs='*', help='只训练指定货币')
+    parser.add_argument('--look-back', type=int, default=20)
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help='并行训练进程数')
+    parser.add_argument('--threads', type=int, default=2, help='每个进程的TensorFlow计算线程数')
+    parser.add_argument('--full', action='store_true', help='禁用增量微调，全部完整训练')
+    parser.add_argument('--force', action='store_true', help='数据未变化也重新训练')
+    parser.add_argument('--export-onnx', action='store_true', help='训练完成后导出ONNX推理模型')
+    args = parser.parse_args()
+
+    # 训练前先把汇率文件导入列式存储，工作进程只做内存映射读取
+    from rate_store import get_store
+    ingested, _ = get_store().build([os.path.abspath(args.data_root), SCRIPT_DIR])
+    if ingested:
+        print(f"汇率存储已更新 {len(ingested)} 个序列", file=sys.stderr)
+
+    jobs = discover_jobs(os.path.abspath(args.data_root), args.currencies)
+    print(f"发现 {len(jobs)} 个训练任务，使用 {args.workers} 个进程，每进程 {args.threads} 线程", file=sys.stderr)
+
+    start_time = time.time()
+    reports = []
+    # 使用spawn启动，保证每个工作进程在导入TensorFlow前完成线程配置
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=init_worker, initargs=(args.threads,)) as executor:
+        futures = {
+            executor.submit(train_job, currency, dataset_path, args.look_back,
+                            args.epochs, args.full, args.force, args.export_onnx): (currency, dataset_path)
+            for currency, dataset_path in jobs
+        }
+        for future in as_completed(futures):
+            currency, dataset_path = futures[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                report = {'currency': currency, 'dataset': dataset_path, 'status': 'failed', 'reason': str(e)}
+            reports.append(report)
+            print(f"[{report['status']}] {currency} @ {os.path.basename(dataset_path)} "
+                  f"version={report.get('version')} loss={report.get('final_loss')} "
+                  f"wall={report.get('wall_seconds')}s", file=sys.stderr)
+
+    from model_registry import get_registry
+    report_path = write_report(reports, get_registry().root)
+
+    summary = {
+        'total': len(reports),
+        'trained': sum(r['status'] == 'trained' for r in reports),
+        'up_to_date': sum(r['status'] == 'up_to_date' for r in reports),
+        'skipped': sum(r['status'] == 'skipped' for r in reports),
+        'failed': sum(r['status'] == 'failed' for r in reports),
+        'wall_seconds': round(time.time() - start_time, 2),
+        'report': report_path,
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    sys.exit(1 if summary['failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+时间序列滑动窗口工具
+基于 numpy.lib.stride_tricks.sliding_window_view 构造零拷贝窗口视图，
+供训练窗口构造和监督学习格式转换共用
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import DataFrame
+
+
+def sliding_windows(values, window, axis=0):
+    """返回沿 axis 的零拷贝窗口视图，窗口维度追加在最后"""
+    return sliding_window_view(np.asarray(values), window, axis=axis)
+
+
+def window_xy(data_scaled, original_values, start_idx, look_back):
+    """构造 (价格窗口, 情感窗口, 下一日价格) 训练样本"""
+    n_samples = max(len(data_scaled) - look_back, 0)
+    if n_samples == 0:
+        # 数据不足一个窗口加一个目标值，sliding_window_view 会报错，直接返回空样本
+        empty = np.empty((0, look_back, 1), dtype=np.asarray(data_scaled).dtype)
+        return empty, empty.copy(), np.empty((0, 1), dtype=np.asarray(original_values).dtype)
+    # 窗口 i 覆盖 [i, i+look_back)，最后一个完整窗口之后没有目标值，需要去掉
+    windows = sliding_windows(data_scaled[:, 0:2], look_back)[:n_samples]
+    X1 = windows[:, 0, :].reshape(-1, look_back, 1)
+    X2 = windows[:, 1, :].reshape(-1, look_back, 1)
+    Y = original_values[start_idx + look_back:start_idx + look_back + n_samples, 0].reshape(-1, 1)
+    return X1, X2, Y
+
+
+def series_to_supervised(data, n_in=1, n_out=1, dropnan=True):
+    """转换时间序列数据为监督学习格式"""
+    n_vars = 1 if type(data) is list else data.shape[1]
+    df = DataFrame(data)
+    names = list()
+    for i in range(n_in, 0, -1):
+        names += [('var%d(t-%d)' % (j+1, i)) for j in range(n_vars)]
+    for i in range(0, n_out):
+        if i == 0:
+            names += [('var%d(t)' % (j+1)) for j in range(n_vars)]
+        else:
+            names += [('var%d(t+%d)' % (j+1, i)) for j in range(n_vars)]
+
+    # 按列存放（n_vars, n），每个滞后列都是一段连续内存的拷贝；
+    # 浮点输入保持原 dtype（与 shift 拼接的结果一致），整数等输入需要容纳 NaN，转为 float64
+    dtype = df.values.dtype if np.issubdtype(df.values.dtype, np.floating) else np.float64
+    values = np.ascontiguousarray(df.values.astype(dtype).T)
+    width = n_in + n_out
+    if dropnan:
+        # 只保留完整窗口：第 k 个窗口对应原序列第 k+n_in 行
+        n_rows = values.shape[1] - n_in - max(n_out, 1) + 1
+        if n_rows <= 0:
+            windows = np.empty((n_vars, 0, width), dtype=dtype)
+        else:
+            windows = sliding_windows(values, width, axis=1)[:, :n_rows]
+        index = df.index[n_in:n_in + windows.shape[1]]
+    else:
+        # 首尾补NaN后，第 t 行的窗口正好是 [t-n_in, t+n_out)
+        padded = np.hstack([
+            np.full((n_vars, n_in), np.nan, dtype=dtype),
+            values,
+            np.full((n_vars, max(n_out - 1, 0)), np.nan, dtype=dtype),
+        ])
+        windows = sliding_windows(padded, width, axis=1)[:, :values.shape[1]]
+        index = df.index
+    columns = np.ascontiguousarray(windows.transpose(2, 0, 1)).reshape(width * n_vars, -1)
+
+    # 原始数据本身含NaN时才需要逐行过滤
+    if dropnan and np.isnan(values).any():
+        keep = ~np.isnan(columns).any(axis=0)
+        columns, index = columns[:, keep], index[keep]
+    return DataFrame(columns.T, index=index, columns=names, copy=False)